@@ -0,0 +1,730 @@
+""" Benchmarks for the search components.
+
+    Run from the directory that holds the MCTS checkout, for example:
+
+        python -m MCTS.Benchmarks solver
+"""
+import cProfile
+import os
+import pstats
+import socket
+import sys
+import tempfile
+import tracemalloc
+import numpy as np
+from functools import partial
+from time import time
+from . import Connect4
+from . import Gomoku
+from . import TicTacToe
+from .Distributed import (Coordinator, ReceiveMessage, SendMessage,
+                          StartLocalWorkers)
+from .DynamicMCTS import DynamicMCTS
+from .EndgameSolver import EndgameSolver
+from .FixedMCTS import FixedMCTS
+from .GameState import GameState
+from .MCTS import Node
+from .RandomPool import RandomPool
+from .RolloutPolicies import RandomPolicy, WinningLinePolicy
+from .SelectionPolicies import PUCTPolicy, UCB1TunedPolicy, UCTPolicy
+from .TreeStats import ExportTree, TreeArrays, TreeSummary
+
+
+def randomPosition(state, movesRemaining, rng):
+    """ Plays random moves until a set number of moves remain.
+
+        Args:
+            state: A GameState object to play from. It is not modified.
+            movesRemaining: The number of empty cells to leave.
+            rng: A numpy Generator used to pick the moves.
+
+        Returns:
+            A non-terminal GameState object, or None if the game ended first.
+    """
+    state = state.Copy()
+    while state.MovesRemaining() > movesRemaining:
+        action = rng.choice(np.where(state.LegalActions() == 1)[0])
+        state.ApplyAction(action)
+        if state.Winner(action) is not None:
+            return None
+    return state
+
+
+def samplePositions(newGame, movesRemaining, count, seed=0):
+    rng = np.random.default_rng(seed)
+    positions = []
+    while len(positions) < count:
+        state = randomPosition(newGame(), movesRemaining, rng)
+        if state is not None:
+            positions.append(state)
+    return positions
+
+
+def benchSolver(count=20):
+    """ Reports the positions and nodes per second of the EndgameSolver.
+    """
+    games = [('Connect4', Connect4.BoardState, [6, 9, 12]),
+             ('TicTacToe 3x3', lambda: TicTacToe.BoardState(3, 3), [5, 7, 9]),
+             ('TicTacToe 4x4', lambda: TicTacToe.BoardState(4, 3), [6, 8])]
+    for name, newGame, depths in games:
+        for movesRemaining in depths:
+            positions = samplePositions(newGame, movesRemaining, count)
+            solver = EndgameSolver()
+            start = time()
+            scores = [solver.Solve(p) for p in positions]
+            elapsed = time() - start
+            print('{:>14} empty={:>2}: {:8.1f} positions/s {:10.0f} nodes/s '
+                  'mean score {:+.2f}'.format(name, movesRemaining,
+                                              count / elapsed,
+                                              solver.Nodes / elapsed,
+                                              np.mean(scores)))
+
+
+def playGame(players, state):
+    """ Plays one game between two searches, dropping trees between moves.
+
+        Args:
+            players: A dict mapping each player number to an MCTS object.
+            state: The GameState object to play from.
+
+        Returns:
+            The winner of the game, 0 for a draw.
+    """
+    winner = state.Winner()
+    while winner is None:
+        player = players[state.Player]
+        player.DropRoot()
+        state = player.FindMove(state, 0)[0]
+        winner = state.Winner()
+    return winner
+
+
+def arena(newPlayerA, newPlayerB, newGame, games, seed=0):
+    """ Plays games between two searches, alternating who moves first.
+
+        The player factories take a seed keyword, and every game seeds both
+        searches differently.
+
+        Returns:
+            A tuple of the wins of A, draws and wins of B.
+    """
+    results = [0, 0, 0]
+    for g in range(games):
+        a = newPlayerA(seed=seed + 2 * g)
+        b = newPlayerB(seed=seed + 2 * g + 1)
+        players = {1: a, 2: b} if g % 2 == 0 else {1: b, 2: a}
+        winner = playGame(players, newGame())
+        if winner == 0:
+            results[1] += 1
+        elif players[winner] is a:
+            results[0] += 1
+        else:
+            results[2] += 1
+    return tuple(results)
+
+
+def benchRave(games=20, playLimit=100):
+    """ Plays RAVE against plain UCT at an equal number of playouts.
+    """
+    games_ = [('Connect4', Connect4.BoardState),
+              ('TicTacToe 5x5/4', lambda: TicTacToe.BoardState(5, 4))]
+    for name, newGame in games_:
+        for k in (100, 1000):
+            rave = lambda seed: DynamicMCTS(explorationRate=1,
+                                            playLimit=playLimit, rave=True,
+                                            raveEquivalence=k, seed=seed)
+            plain = lambda seed: DynamicMCTS(explorationRate=1,
+                                             playLimit=playLimit, seed=seed)
+            start = time()
+            wins, draws, losses = arena(rave, plain, newGame, games)
+            print('{:>16} playLimit={} k={:>4}: RAVE {}-{}-{} vs UCT '
+                  '({:.0f}s)'.format(name, playLimit, k, wins, draws, losses,
+                                     time() - start))
+
+
+def benchRollouts(count=30, rollouts=40):
+    """ Compares rollout policies on length, speed and value accuracy.
+
+        Accuracy is the mean absolute error between the average rollout value
+        of a position and its exact value from the EndgameSolver.
+    """
+    games = [('Connect4', Connect4.BoardState, 14),
+             ('TicTacToe 4x4/3', lambda: TicTacToe.BoardState(4, 3), 10),
+             ('TicTacToe 5x5/4', lambda: TicTacToe.BoardState(5, 4), 12)]
+    for name, newGame, movesRemaining in games:
+        positions = samplePositions(newGame, movesRemaining, count)
+        solver = EndgameSolver()
+        exact = [solver.Value(p, p.Player) for p in positions]
+        for policy in (RandomPolicy(), WinningLinePolicy()):
+            mcts = DynamicMCTS(explorationRate=1, rolloutPolicy=policy,
+                               seed=0)
+            plies = 0
+            errors = []
+            start = time()
+            for position, value in zip(positions, exact):
+                total = 0
+                for _ in range(rollouts):
+                    actions = []
+                    total += mcts.SampleValue(position, position.Player,
+                                              actions)
+                    plies += len(actions)
+                errors.append(abs(total / rollouts - value))
+            elapsed = time() - start
+            print('{:>16} {:>17}: {:5.2f} plies/rollout {:7.0f} rollouts/s '
+                  'value MAE {:.3f}'.format(name, type(policy).__name__,
+                                            plies / (count * rollouts),
+                                            count * rollouts / elapsed,
+                                            np.mean(errors)))
+
+
+def playoutsPerSecond(newPlayer, state, playLimit):
+    player = newPlayer()
+    start = time()
+    player.FindMove(state, 0, playLimit=playLimit)
+    return playLimit / (time() - start)
+
+
+def benchTruncated(games=20, playLimit=100, maxDepth=2):
+    """ Measures FixedMCTS playout speed and strength with cut off rollouts.
+
+        A shallow maxDepth keeps tree expansion from hiding the rollout cost.
+    """
+    boards = [('Connect4', Connect4.BoardState, 200),
+              ('TicTacToe 9x9/5', lambda: TicTacToe.BoardState(9, 5), 40),
+              ('TicTacToe 15x15/5', lambda: TicTacToe.BoardState(15, 5), 10)]
+    for name, newGame, plays in boards:
+        for depth in (None, 8, 4, 0):
+            newPlayer = lambda: FixedMCTS(maxDepth=maxDepth, explorationRate=1,
+                                          rolloutDepth=depth, seed=0)
+            print('{:>18} rolloutDepth={!s:>4}: {:7.1f} playouts/s'.format(
+                name, depth, playoutsPerSecond(newPlayer, newGame(), plays)))
+
+    for depth in (8, 4):
+        truncated = lambda seed: FixedMCTS(maxDepth=maxDepth,
+                                           explorationRate=1,
+                                           playLimit=playLimit,
+                                           rolloutDepth=depth, seed=seed)
+        full = lambda seed: FixedMCTS(maxDepth=maxDepth, explorationRate=1,
+                                      playLimit=playLimit, seed=seed)
+        start = time()
+        wins, draws, losses = arena(truncated, full, Connect4.BoardState,
+                                    games)
+        print('Connect4 playLimit={} rolloutDepth={}: {}-{}-{} vs full '
+              'rollouts ({:.0f}s)'.format(playLimit, depth, wins, draws,
+                                          losses, time() - start))
+
+
+def exactActionValues(solver, state):
+    """ Finds the exact value of each legal action for the player to move.
+    """
+    values = {}
+    for action in np.where(state.LegalActions() == 1)[0]:
+        child = state.Copy()
+        child.ApplyAction(action)
+        values[action] = (1 - solver.Solve(child, action)) / 2
+    return values
+
+
+def benchHalving(count=40, playLimits=(50, 100, 200)):
+    """ Compares move quality of sequential halving and UCT at small budgets.
+
+        Positions are kept only if at most half of their moves are optimal. A
+        move is optimal if the EndgameSolver gives it the best exact value.
+        Regret is the exact value lost against the best move.
+    """
+    games = [('Connect4', Connect4.BoardState, 14),
+             ('TicTacToe 5x5/4', lambda: TicTacToe.BoardState(5, 4), 13)]
+    searches = [('uct', {}),
+                ('halving', {'rootSearch': 'halving'}),
+                ('gumbel', {'rootSearch': 'halving', 'gumbel': True})]
+    for name, newGame, movesRemaining in games:
+        solver = EndgameSolver()
+        positions = []
+        exact = []
+        seed = 0
+        while len(positions) < count:
+            for p in samplePositions(newGame, movesRemaining, count, seed):
+                values = exactActionValues(solver, p)
+                best = max(values.values())
+                if sum(v == best for v in values.values()) <= len(values) / 2:
+                    positions.append(p)
+                    exact.append(values)
+            seed += 1
+        positions, exact = positions[:count], exact[:count]
+        for playLimit in playLimits:
+            for label, kwargs in searches:
+                optimal = 0
+                regret = 0
+                for position, values in zip(positions, exact):
+                    mcts = DynamicMCTS(explorationRate=1, seed=0, **kwargs)
+                    nextState = mcts.FindMove(position, 0,
+                                              playLimit=playLimit)[0]
+                    action = [a for a in values
+                              if _applied(position, a) == nextState][0]
+                    best = max(values.values())
+                    optimal += values[action] == best
+                    regret += best - values[action]
+                print('{:>16} playLimit={:>3} {:>7}: {:4.0%} optimal, mean '
+                      'regret {:.3f}'.format(name, playLimit, label,
+                                             optimal / count, regret / count))
+
+
+def _applied(state, action):
+    child = state.Copy()
+    child.ApplyAction(action)
+    return child
+
+
+def benchWidening():
+    """ Measures search memory and speed with and without widening.
+
+        Peak memory is traced over one FindMove on an empty board. Rollouts
+        use the WinningLinePolicy so that tree costs dominate.
+    """
+    boards = [('TicTacToe 9x9/5', lambda: TicTacToe.BoardState(9, 5), 200),
+              ('TicTacToe 15x15/5', lambda: TicTacToe.BoardState(15, 5), 100)]
+    modes = [('full', {}),
+             ('priors', {'widening': True}),
+             ('locality', {'widening': True,
+                           'wideningHeuristic': 'locality'})]
+    for name, newGame, playLimit in boards:
+        for label, kwargs in modes:
+            mcts = DynamicMCTS(explorationRate=1,
+                               rolloutPolicy=WinningLinePolicy(), seed=0,
+                               **kwargs)
+            tracemalloc.start()
+            start = time()
+            mcts.FindMove(newGame(), 0, playLimit=playLimit)
+            elapsed = time() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            nodes = sum(countNodesByDepth(mcts.Root, 100))
+            print('{:>18} {:>8}: {:7.1f} playouts/s {:7d} nodes {:8.1f} MB '
+                  'peak'.format(name, label, playLimit / elapsed, nodes,
+                                peak / 2 ** 20))
+
+
+def benchBitboard(games=20):
+    """ Compares the bitset Gomoku engine with the array TicTacToe engine.
+
+        Plays uniformly random games, timing ApplyAction plus an incremental
+        Winner(action), RandomAction and LegalActions per ply.
+    """
+    boards = [(3, 3), (9, 5), (15, 5)]
+    engines = [('TicTacToe', TicTacToe.BoardState),
+               ('Gomoku', Gomoku.BoardState)]
+    for size, inARow in boards:
+        for name, newGame in engines:
+            rng = np.random.default_rng(0)
+            plies = 0
+            applyTime = randomTime = legalTime = 0
+            start = time()
+            for _ in range(games):
+                state = newGame(size, inARow)
+                winner = None
+                while winner is None:
+                    t0 = time()
+                    state.LegalActions()
+                    t1 = time()
+                    action = state.RandomAction(rng)
+                    t2 = time()
+                    state.ApplyAction(action)
+                    winner = state.Winner(action)
+                    t3 = time()
+                    legalTime += t1 - t0
+                    randomTime += t2 - t1
+                    applyTime += t3 - t2
+                    plies += 1
+            elapsed = time() - start
+            print('{:>2}x{:<2}/{} {:>9}: {:8.1f} games/s, per ply: apply+winner '
+                  '{:6.1f}us random {:6.1f}us legal {:6.1f}us'.format(
+                      size, size, inARow, name, games / elapsed,
+                      1e6 * applyTime / plies, 1e6 * randomTime / plies,
+                      1e6 * legalTime / plies))
+
+
+class _SyntheticState(GameState):
+    """ A placeholder state for the Nodes of a synthetic tree.
+    """
+
+    def Winner(self, prevAction=None):
+        return None
+
+
+def syntheticTree(branching, depth, seed=0):
+    """ Builds a complete tree of Nodes with random play counts.
+    """
+    rng = np.random.default_rng(seed)
+    legal = np.ones(branching)
+    state = _SyntheticState()
+    root = Node(state, legal, legal)
+    level = [root]
+    for _ in range(depth):
+        nextLevel = []
+        for node in level:
+            node.Actions = np.arange(branching)
+            node.Children = [Node(state, legal, legal)
+                             for _ in range(branching)]
+            for a, child in enumerate(node.Children):
+                child.Parent = node
+                child.Action = a
+            nextLevel.extend(node.Children)
+        level = nextLevel
+    plays = rng.integers(0, 100, size=len(level)).tolist()
+    for node, p in zip(level, plays):
+        node.Plays = p
+        node.Value = p / 2
+    return root
+
+
+def benchTreeStats(branching=10, depth=6):
+    """ Times flattening, summarizing and exporting a million-node tree.
+    """
+    start = time()
+    root = syntheticTree(branching, depth)
+    print('built {}-ary depth {} tree in {:.1f}s'.format(branching, depth,
+                                                         time() - start))
+
+    start = time()
+    arrays = TreeArrays(root)
+    flatten = time() - start
+    start = time()
+    summary = TreeSummary(arrays)
+    summarize = time() - start
+    path = os.path.join(tempfile.mkdtemp(), 'tree.npz')
+    start = time()
+    ExportTree(root, path)
+    export = time() - start
+    print('{} nodes: TreeArrays {:.2f}s, TreeSummary {:.2f}s, ExportTree '
+          '{:.2f}s ({:.1f} MB)'.format(summary['nodes'], flatten, summarize,
+                                       export, os.path.getsize(path) / 2 ** 20))
+    os.remove(path)
+
+    mcts = DynamicMCTS(explorationRate=1, rolloutPolicy=WinningLinePolicy(),
+                       seed=0)
+    mcts.FindMove(Connect4.BoardState(), 0, playLimit=2000)
+    arrays, summary = mcts.TreeStats()
+    print('Connect4 after 2000 playouts: {nodes} nodes, max depth {maxDepth}, '
+          'branching {branchingFactor:.2f}, effective branching '
+          '{effectiveBranchingFactor:.2f}, root concentration '
+          '{rootVisitConcentration:.2f}, mean concentration '
+          '{visitConcentration:.2f}'.format(**summary))
+    print('depth histogram: {}'.format(summary['depthHistogram']))
+
+
+class _CountedDraws(object):
+    """ Wraps a source of uniform draws and counts them.
+    """
+
+    def __init__(self, source):
+        self.Source = source
+        self.Draws = 0
+
+    def random(self):
+        self.Draws += 1
+        return self.Source.random()
+
+
+def benchRandom(draws=1000000, playLimit=2000):
+    """ Measures random draw overhead and checks that seeded searches repeat.
+
+        Times one draw from the global np.random (the source rollouts used
+        before searches had their own streams), a Generator and a
+        RandomPool. Counts the draws per playout of Connect4 and TicTacToe
+        searches to give the draw overhead per playout before and after.
+        Then runs Connect4 searches twice with the same seed and once with
+        another, comparing the root visit counts.
+    """
+    rng = np.random.default_rng(0)
+    sources = [('np.random', np.random), ('Generator', rng),
+               ('RandomPool', RandomPool(rng))]
+    cost = {}
+    for name, source in sources:
+        draw = source.random
+        start = time()
+        for _ in range(draws):
+            draw()
+        cost[name] = (time() - start) / draws
+        print('{:>10}: {:6.3f}us per draw'.format(name, 1e6 * cost[name]))
+
+    games = [('Connect4', Connect4.BoardState),
+             ('TicTacToe 5x5/4', lambda: TicTacToe.BoardState(5, 4))]
+    for name, newGame in games:
+        for newPolicy in (RandomPolicy, WinningLinePolicy):
+            mcts = DynamicMCTS(explorationRate=1, rolloutPolicy=newPolicy(),
+                               seed=0)
+            counter = _CountedDraws(mcts.Randoms)
+            mcts.RolloutPolicy.Random = counter
+            start = time()
+            mcts.FindMove(newGame(), 0, playLimit=playLimit)
+            playoutTime = (time() - start) / playLimit
+            perPlayout = counter.Draws / playLimit
+            print('{:>16} {:>17}: {:5.1f} draws/playout, draw overhead '
+                  '{:5.2f}us -> {:5.2f}us of a {:6.1f}us playout'.format(
+                      name, newPolicy.__name__, perPlayout,
+                      1e6 * perPlayout * cost['np.random'],
+                      1e6 * perPlayout * cost['RandomPool'],
+                      1e6 * playoutTime))
+
+    for name, newPolicy in (('random', RandomPolicy),
+                            ('winning line', WinningLinePolicy)):
+        plays = []
+        for seed in (1, 1, 2):
+            mcts = DynamicMCTS(explorationRate=1, rolloutPolicy=newPolicy(),
+                               seed=seed)
+            start = time()
+            mcts.FindMove(Connect4.BoardState(), 1, playLimit=playLimit)
+            elapsed = time() - start
+            plays.append(mcts.Root.ChildPlays().tolist())
+        print('{:>12} policy: {:7.1f} playouts/s, same seed identical: {}, '
+              'other seed differs: {}'.format(name, playLimit / elapsed,
+                                              plays[0] == plays[1],
+                                              plays[0] != plays[2]))
+
+
+def _deadAddress():
+    """ Finds a localhost address with nothing listening on it.
+    """
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()
+
+
+def benchDistributed(workerCounts=(1, 2, 4), moveTime=1.0):
+    """ Runs root-parallel Connect4 searches on localhost worker processes.
+
+        Reports aggregate playouts/s and merge latency per worker count, then
+        repeats with one dead address and one worker kept busy by an earlier
+        job, which the deadline has to leave out. Checks that the busy
+        worker then skips the expired job queued for it, that a bad job gets
+        an error reply without stopping its worker, and runs playLimit
+        searches with an explicit deadline, one of which it cuts short.
+    """
+    newSearch = partial(DynamicMCTS, explorationRate=1,
+                        rolloutPolicy=WinningLinePolicy())
+    state = Connect4.BoardState()
+    local = newSearch(seed=0)
+    start = time()
+    local.FindMove(state, 0, moveTime=moveTime)
+    print('single process: {:8.1f} playouts/s'.format(
+        local.Root.Plays / (time() - start)))
+
+    processes, addresses = StartLocalWorkers(newSearch, max(workerCounts))
+    try:
+        for count in workerCounts:
+            coordinator = Coordinator(addresses[:count], grace=0.5, seed=0)
+            coordinator.FindMove(state, 0, moveTime=moveTime)
+            print('{} workers: {playoutsPerSecond:8.1f} playouts/s, '
+                  '{playouts} playouts in {elapsed:.2f}s, merge latency '
+                  '{:.2f}ms'.format(count, 1e3 * coordinator.Stats[
+                      'mergeLatency'], **coordinator.Stats))
+            coordinator.Close()
+
+        busy = socket.create_connection(addresses[0])
+        ReceiveMessage(busy)
+        SendMessage(busy, {'state': state, 'temp': 0,
+                           'moveTime': 3 * moveTime, 'playLimit': None,
+                           'seed': 0, 'budget': 4 * moveTime})
+        coordinator = Coordinator(addresses + [_deadAddress()], grace=0.5,
+                                  seed=0)
+        coordinator.FindMove(state, 0, moveTime=moveTime)
+        print('{} workers, 1 busy, 1 dead: {workers} replied, {failed} '
+              'failed, {playoutsPerSecond:8.1f} playouts/s in '
+              '{elapsed:.2f}s'.format(len(addresses) + 1,
+                                      **coordinator.Stats))
+        ReceiveMessage(busy)
+        busy.close()
+        coordinator.FindMove(state, 0, moveTime=moveTime)
+        print('after the busy job, stale queued jobs skipped: {workers} '
+              'replied, {failed} failed'.format(**coordinator.Stats))
+        coordinator.Close()
+
+        with socket.create_connection(addresses[0]) as bad:
+            ReceiveMessage(bad)
+            SendMessage(bad, {'state': None, 'temp': 0, 'moveTime': moveTime,
+                              'playLimit': None, 'seed': 0,
+                              'budget': moveTime})
+            print('bad job answered with: {}'.format(
+                ReceiveMessage(bad)['error']))
+        coordinator = Coordinator(addresses, seed=0)
+        coordinator.FindMove(state, 0, playLimit=500, deadline=5 * moveTime)
+        print('playLimit=500 per worker: {workers} replied, {playouts} '
+              'playouts in {elapsed:.2f}s'.format(**coordinator.Stats))
+        coordinator.FindMove(state, 0, playLimit=10 ** 6, deadline=moveTime)
+        print('playLimit=1e6 cut to a {:.1f}s deadline: {workers} replied, '
+              '{playouts} playouts in {elapsed:.2f}s'.format(
+                  moveTime, **coordinator.Stats))
+        coordinator.Close()
+    finally:
+        for process in processes:
+            process.terminate()
+
+
+def _legacySelect(node, explorationRate):
+    """ The child scan and bound that _selectAction used before policies.
+    """
+    winRates = np.zeros(len(node.Children))
+    plays = np.zeros(len(node.Children))
+    for i in range(len(node.Children)):
+        if node.Children[i] is not None:
+            winRates[i] = node.Children[i].WinRate()
+    for i in range(len(node.Children)):
+        if node.Children[i] is not None:
+            plays[i] = node.Children[i].Plays
+    allPlays = sum(plays)
+    upperConfidence = (winRates + (explorationRate * node.Priors[node.Actions]
+                                   * np.sqrt(1.0 + allPlays)) / (1.0 + plays))
+    legal = node.LegalActions[node.Actions] == 1
+    return np.argmax(np.where(legal, upperConfidence, -np.inf))
+
+
+def benchSelection(calls=20000):
+    """ Times one selection step at branching factors 7 and 225.
+
+        Expands the opening of Connect4 and of 15x15 Gomoku, gives the
+        children random statistics, and times _selectAction with each
+        SelectionPolicy against the previous scan of the children.
+    """
+    games = [('Connect4', Connect4.BoardState),
+             ('Gomoku 15x15', Gomoku.BoardState)]
+    policies = [PUCTPolicy, UCTPolicy, UCB1TunedPolicy]
+    for name, newGame in games:
+        rng = np.random.default_rng(0)
+        mcts = DynamicMCTS(explorationRate=1)
+        state = newGame()
+        root = Node(state, state.LegalActions(), mcts.GetPriors(state))
+        mcts.AddChildren(root)
+        for slot, child in enumerate(root.Children):
+            child.Plays = int(rng.integers(0, 50))
+            child.Value = child.Plays * rng.random()
+            root._childPlays[slot] = child.Plays
+            root._childTotals[slot] = child.Value
+            root._childSquares[slot] = child.Value
+        root.Plays = int(root._childPlays.sum()) + 1
+
+        start = time()
+        for _ in range(calls):
+            _legacySelect(root, 1)
+        legacy = (time() - start) / calls
+        timings = ['child scan {:6.2f}us'.format(1e6 * legacy)]
+        for newPolicy in policies:
+            mcts.SelectionPolicy = newPolicy()
+            start = time()
+            for _ in range(calls):
+                mcts._selectAction(root, 0)
+            timings.append('{} {:6.2f}us'.format(
+                mcts.SelectionPolicy.Name, 1e6 * (time() - start) / calls))
+        print('{:>12} (branching {:3}): {}'.format(name, len(root.Children),
+                                                   ', '.join(timings)))
+
+
+def benchStateCache(playLimit=3000):
+    """ Profiles how much search time goes to a state's derived facts.
+
+        Runs a seeded DynamicMCTS search with random rollouts and reports
+        playouts/s and the share of the profiled time spent inside the
+        state's LegalActions, Winner and ApplyAction, including the helpers
+        they call.
+    """
+    games = [('Connect4', Connect4.BoardState, Connect4.BoardState),
+             ('TicTacToe 3x3', lambda: TicTacToe.BoardState(3, 3),
+              TicTacToe.BoardState),
+             ('TicTacToe 5x5/4', lambda: TicTacToe.BoardState(5, 4),
+              TicTacToe.BoardState)]
+    for name, newGame, stateClass in games:
+        mcts = DynamicMCTS(explorationRate=1, seed=0)
+        start = time()
+        mcts.FindMove(newGame(), 0, playLimit=playLimit)
+        elapsed = time() - start
+
+        mcts = DynamicMCTS(explorationRate=1, seed=0)
+        profile = cProfile.Profile()
+        profile.runcall(mcts.FindMove, newGame(), 0, playLimit=playLimit)
+        stats = pstats.Stats(profile).stats
+        total = sum(entry[2] for entry in stats.values())
+        shares = []
+        for method in ('LegalActions', 'Winner', 'ApplyAction'):
+            code = getattr(stateClass, method).__code__
+            key = (code.co_filename, code.co_firstlineno, code.co_name)
+            shares.append('{} {:4.1%}'.format(
+                method, stats[key][3] / total if key in stats else 0))
+        print('{:>15}: {:7.1f} playouts/s, state time: {}'.format(
+            name, playLimit / elapsed, ', '.join(shares)))
+
+
+def countNodesByDepth(root, maxDepth, visitedOnly=False):
+    """ Counts the distinct Node objects at each depth below a root.
+    """
+    counts = []
+    level = [root]
+    for _ in range(maxDepth + 1):
+        counts.append(len(level))
+        seen = {}
+        for node in level:
+            for child in node.Children or []:
+                if child is not None and (child.Plays > 0 or not visitedOnly):
+                    seen[id(child)] = child
+        level = list(seen.values())
+    return counts
+
+
+def benchSymmetry(plies=4, playLimit=2000):
+    """ Reports how many root-near nodes symmetry merging removes.
+
+        Counts nodes per ply in a full-width expansion of the opening, and
+        visited nodes in a DynamicMCTS tree after playLimit playouts, with and
+        without symmetry.
+    """
+    games = [('Connect4', Connect4.BoardState),
+             ('TicTacToe 3x3', lambda: TicTacToe.BoardState(3, 3))]
+    for name, newGame in games:
+        full = {}
+        searched = {}
+        for symmetry in (False, True):
+            mcts = DynamicMCTS(explorationRate=1, symmetry=symmetry, seed=0)
+            state = newGame()
+            root = Node(state, state.LegalActions(), mcts.GetPriors(state))
+            level = [root]
+            for _ in range(plies):
+                nextLevel = []
+                for node in level:
+                    if node.State.Winner() is None:
+                        mcts.AddChildren(node)
+                        nextLevel.extend(c for c in node.Children
+                                         if c is not None)
+                level = list({id(n): n for n in nextLevel}.values())
+            full[symmetry] = countNodesByDepth(root, plies)
+
+            mcts.FindMove(newGame(), 0, playLimit=playLimit)
+            searched[symmetry] = countNodesByDepth(mcts.Root, plies, True)
+        for label, counts in (('full-width', full), ('searched', searched)):
+            print('{:>14} {:>10}: '.format(name, label) + ', '.join(
+                'ply {} {}->{} ({:.0%})'.format(d, counts[False][d],
+                                                counts[True][d],
+                                                1 - counts[True][d] /
+                                                max(counts[False][d], 1))
+                for d in range(1, plies + 1)))
+
+
+Benchmarks = {
+    'solver': benchSolver,
+    'symmetry': benchSymmetry,
+    'rave': benchRave,
+    'rollouts': benchRollouts,
+    'truncated': benchTruncated,
+    'halving': benchHalving,
+    'widening': benchWidening,
+    'bitboard': benchBitboard,
+    'treestats': benchTreeStats,
+    'random': benchRandom,
+    'distributed': benchDistributed,
+    'selection': benchSelection,
+    'statecache': benchStateCache,
+}
+
+
+if __name__ == '__main__':
+    names = sys.argv[1:] or list(Benchmarks)
+    for name in names:
+        print('== {} =='.format(name))
+        Benchmarks[name]()
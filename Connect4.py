@@ -19,35 +19,39 @@ class BoardState(GameState):
         self.Board = np.zeros((self.Height, self.Width, 2), dtype=np.int8)
         self.Player = 1
         self.PreviousPlayer = None
+        self._heights = [0] * self.Width
+        self._legal = np.ones(self.Width)
+        self._winner = None
 
     def Copy(self):
         copy = BoardState()
         copy.Player = self.Player
         copy.Board = np.copy(self.Board)
+        copy._heights = list(self._heights)
+        copy._legal = np.copy(self._legal)
+        copy._winner = self._winner
         return copy
 
     def LegalActions(self):
-        actions = np.zeros(self.Width)
-        for j in range(self.Width):
-            if np.sum(self.Board[self.Height-1, j, :]) == 0:
-                actions[j] = 1
-
-        return actions
+        return self._legal
 
     def LegalActionShape(self):
         return np.array([self.Width], dtype=np.int8)
 
     def ApplyAction(self, action):
-        if np.sum(self.Board[self.Height -1, action, :]) != 0:
+        row = self._heights[action]
+        if row >= self.Height:
             raise ValueError('Tried to make an illegal move.')
 
-        top = -1
-        for i in reversed(range(self.Height)):
-            if np.sum(self.Board[i, action, :]) != 0:
-                top = i
-                break
-
-        self.Board[top + 1, action, self.Player - 1] = 1
+        self.Board[row, action, self.Player - 1] = 1
+        self._heights[action] = row + 1
+        if row + 1 == self.Height:
+            self._legal[action] = 0
+        if self._checkVictory(self.Board[:, :, self.Player - 1],
+                              row, action) is not None:
+            self._winner = self.Player
+        elif self.MovesRemaining() == 0:
+            self._winner = 0
         self.PreviousPlayer = self.Player
         self.Player = 1 if self.Player == 2 else 2
 
@@ -59,37 +63,28 @@ class BoardState(GameState):
         return array
 
     def Winner(self, prevAction=None):
-        board = self._collapsed()
-
-        if prevAction is not None:
-            for i in reversed(range(self.Height)):
-                if np.sum(self.Board[i, prevAction, :]) != 0:
-                    break
-            win = self._checkVictory(board, i, prevAction)
-            if win is not None: 
-                return win
-        else:
-            for i in range(self.Height):
-                for j in range(self.Width):
-                    if board[i,j] == 0:
-                        continue
-                    win = self._checkVictory(board, i, j)
-                    if win is not None: 
-                        return win
-
-        if self._isOver(board):
-            return 0
-        return None
+        return self._winner
+
+    def CanonicalForm(self):
+        mirrored = self.Board[:, ::-1, :]
+        if mirrored.tobytes() >= self.Board.tobytes():
+            return self, None
+        canonical = self.Copy()
+        canonical.PreviousPlayer = self.PreviousPlayer
+        canonical.Board = np.ascontiguousarray(mirrored)
+        canonical._heights = self._heights[::-1]
+        canonical._legal = np.ascontiguousarray(self._legal[::-1])
+        return canonical, np.arange(self.Width - 1, -1, -1)
+
+    def LineGeometry(self):
+        return self.Height, self.Width, self.InARow, True
+
+    def MovesRemaining(self):
+        return self.Height * self.Width - sum(self._heights)
 
     def EvalToString(self, eval):
         return str(eval)
 
-    def _isOver(self, board):
-        for j in range(self.Width):
-            if np.sum(self.Board[self.Height-1, j, :]) == 0:
-                return False
-        return True
-
     def _checkVictory(self, board, i, j):
         p = board[i,j]
         for dir in self.Dirs:
@@ -131,7 +126,7 @@ class BoardState(GameState):
         return (other.Board == self.Board).all()
 
     def __hash__(self):
-        return "{0}{1}".format(self.Player,str(self)).__hash__()
+        return hash((self.Player, self.Board.tobytes()))
 
 if __name__ == '__main__':
     params = {'maxDepth' : 10, 'explorationRate' : 1, 'playLimit' : 100}
@@ -0,0 +1,367 @@
+""" Root-parallel search spread over worker processes on one or many hosts.
+
+    A SearchWorker hosts a search and listens on a TCP port. A Coordinator
+    sends the same position and budget to every worker, each with its own
+    seed, and merges the root child visits and values that come back before
+    its deadline. Workers that are slow, busy or dead are left out of the
+    merge.
+
+    A worker announces that it is ready for a connection's job before the
+    job is sent, and the job carries the seconds left until the deadline at
+    that moment, so the hosts' clocks need not agree. Messages are pickled,
+    so workers must only be reachable from trusted hosts. A worker can be
+    started from the directory that holds the MCTS checkout with:
+
+        python -m MCTS.Distributed [host] [port]
+"""
+import multiprocessing
+import pickle
+import socket
+import struct
+import sys
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import partial
+from time import time
+from .DynamicMCTS import DynamicMCTS
+from .GameState import GameState
+
+_header = struct.Struct('!Q')
+
+# Seconds a worker keeps free at the end of a job's budget to send its reply.
+_replyMargin = 0.05
+
+
+def SendMessage(sock, message):
+    """ Writes a length-prefixed pickle of message to a socket.
+    """
+    data = pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL)
+    sock.sendall(_header.pack(len(data)) + data)
+
+
+def ReceiveMessage(sock):
+    """ Reads one message written by SendMessage from a socket.
+
+        Raises:
+            ConnectionError: The peer closed the connection mid-message.
+    """
+    size, = _header.unpack(_receiveExactly(sock, _header.size))
+    return pickle.loads(_receiveExactly(sock, size))
+
+
+def _receiveExactly(sock, size):
+    chunks = []
+    while size > 0:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise ConnectionError('Connection closed mid-message.')
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+class SearchWorker(object):
+    """ Serves root-parallel search jobs over TCP, one at a time.
+
+        On each connection the worker first sends 'ready', then reads a job
+        holding a pickled GameState, temp, moveTime, playLimit, seed and
+        budget, the seconds the coordinator still waits for the reply. The
+        worker builds a fresh search with newSearch(seed=seed), runs FindMove
+        until the budget runs out, and replies with the root statistics per
+        action. A job that fails is answered with {'error': message} and the
+        worker keeps serving. A coordinator that gave up while the worker was
+        busy has closed its connection, so its job is never read.
+
+        Attributes:
+            NewSearch: A callable taking a seed keyword and returning an MCTS.
+            Address: The (host, port) the worker listens on.
+            Jobs: The number of jobs served so far.
+    """
+
+    def __init__(self, newSearch, host='127.0.0.1', port=0):
+        self.NewSearch = newSearch
+        self.Jobs = 0
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind((host, port))
+        self._socket.listen()
+        self.Address = self._socket.getsockname()
+
+    def Serve(self, maxJobs=None):
+        """ Answers jobs until maxJobs have been served or Close is called.
+        """
+        while maxJobs is None or self.Jobs < maxJobs:
+            try:
+                connection, _ = self._socket.accept()
+            except OSError:
+                return
+            with connection:
+                try:
+                    if not self._answer(connection):
+                        continue
+                except (ConnectionError, OSError):
+                    continue
+            self.Jobs += 1
+
+    def Run(self, job, deadline=None):
+        """ Runs one job and collects its root statistics.
+
+            Args:
+                job: A job dict, as described above.
+                deadline: (optional) A time() by which the search must stop.
+                    moveTime is cut to it, and a playLimit job gets it as
+                    its moveTime.
+
+            Returns:
+                A dict holding:
+                    - plays: A numpy array of child visits per action.
+                    - values: A numpy array of child total values per action,
+                        from the point of view of the player to move.
+                    - playouts: The number of playouts run.
+                    - elapsed: The search time in seconds.
+        """
+        moveTime = job['moveTime']
+        if deadline is not None:
+            remaining = max(deadline - time(), 0)
+            moveTime = (remaining if moveTime is None
+                        else min(moveTime, remaining))
+        search = self.NewSearch(seed=job['seed'])
+        start = time()
+        search.FindMove(job['state'], job['temp'], moveTime=moveTime,
+                        playLimit=job['playLimit'])
+        elapsed = time() - start
+
+        root = search.Root
+        plays = np.zeros(len(root.LegalActions), dtype=np.float64)
+        values = np.zeros(len(root.LegalActions), dtype=np.float64)
+        childPlays = root.ChildPlays()
+        np.add.at(plays, root.Actions, childPlays)
+        np.add.at(values, root.Actions, root.ChildWinRates() * childPlays)
+        return {'plays': plays, 'values': values,
+                'playouts': int(root.Plays), 'elapsed': elapsed}
+
+    def Close(self):
+        self._socket.close()
+
+    def _answer(self, connection):
+        """ Reads one job from a connection and replies to it.
+
+            Returns:
+                True if the job was run, False if it had no budget left.
+
+            Raises:
+                ConnectionError, OSError: The connection failed.
+        """
+        SendMessage(connection, 'ready')
+        try:
+            job = ReceiveMessage(connection)
+            deadline = time() + job['budget'] - _replyMargin
+            if deadline <= time():
+                return False
+            reply = self.Run(job, deadline)
+        except (ConnectionError, OSError):
+            raise
+        except Exception as error:
+            reply = {'error': '{}: {}'.format(type(error).__name__, error)}
+        SendMessage(connection, reply)
+        return True
+
+
+def RunWorker(newSearch, host='127.0.0.1', port=0, maxJobs=None,
+              ready=None):
+    """ Starts a SearchWorker and serves jobs, for use as a process target.
+
+        Args:
+            ready: An optional queue that receives the worker's Address once
+                it is listening.
+    """
+    worker = SearchWorker(newSearch, host, port)
+    if ready is not None:
+        ready.put(worker.Address)
+    try:
+        worker.Serve(maxJobs)
+    finally:
+        worker.Close()
+
+
+def StartLocalWorkers(newSearch, count):
+    """ Starts count worker processes listening on localhost.
+
+        Args:
+            newSearch: A picklable callable, such as a functools.partial of
+                an MCTS class, used by every worker.
+
+        Returns:
+            A tuple of the list of daemon Processes and the list of their
+                addresses. Terminate the processes when done.
+    """
+    ready = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=RunWorker,
+                                         args=(newSearch,),
+                                         kwargs={'ready': ready},
+                                         daemon=True)
+                 for _ in range(count)]
+    for process in processes:
+        process.start()
+    return processes, [ready.get() for _ in processes]
+
+
+class Coordinator(object):
+    """ Runs a root-parallel search over a set of SearchWorkers.
+
+        Every worker searches the same position independently. Their root
+        child visits and values are summed per action, and the move is chosen
+        from the merged statistics the way MCTS.FindMove chooses it.
+
+        Attributes:
+            Addresses: A list of (host, port) pairs of the workers.
+            Grace: Seconds allowed beyond moveTime for a reply.
+            Rng: The numpy Generator that seeds the workers and samples moves.
+            Stats: A dict describing the last search:
+                - workers: The number of workers that replied in time.
+                - failed: The number of workers that did not.
+                - errors: The error messages of workers whose job failed.
+                - playouts: The total playouts merged.
+                - elapsed: Seconds from sending the jobs to the merged result.
+                - playoutsPerSecond: playouts / elapsed.
+                - mergeLatency: Seconds from the last reply used to the
+                    merged result.
+    """
+
+    def __init__(self, addresses, grace=1.0, seed=None):
+        self.Addresses = list(addresses)
+        self.Grace = grace
+        self.Rng = np.random.default_rng(seed)
+        self.Stats = None
+        self._executor = ThreadPoolExecutor(max_workers=len(self.Addresses))
+
+    def Search(self, state, temp=0, moveTime=None, playLimit=None,
+               deadline=None):
+        """ Sends a search job to every worker and merges the replies.
+
+            Args:
+                state: The GameState to search from.
+                temp: The temperature passed to each worker's FindMove.
+                moveTime: The search time of each worker, in seconds.
+                playLimit: The playouts of each worker.
+                deadline: Seconds to wait for replies. Defaults to moveTime
+                    plus Grace, and must be given if moveTime is None.
+
+            Returns:
+                A tuple of numpy arrays (plays, values) summed per action over
+                the workers that replied in time.
+
+            Raises:
+                TypeError: state was not an object of type GameState.
+                ValueError: No budget or deadline was given, or no worker
+                    replied.
+        """
+        if not isinstance(state, GameState):
+            raise TypeError('State not of type GameState')
+        if moveTime is None and playLimit is None:
+            raise ValueError('Not enough information to decide a stop time.')
+        if deadline is None:
+            if moveTime is None:
+                raise ValueError('A deadline is needed without a moveTime.')
+            deadline = moveTime + self.Grace
+
+        start = time()
+        endTime = start + deadline
+        seeds = self.Rng.integers(2 ** 63, size=len(self.Addresses))
+        futures = [self._executor.submit(self._request, address, endTime,
+                                         {'state': state, 'temp': temp,
+                                          'moveTime': moveTime,
+                                          'playLimit': playLimit,
+                                          'seed': int(seed)})
+                   for address, seed in zip(self.Addresses, seeds)]
+        done, _ = wait(futures, timeout=max(endTime - time(), 0))
+
+        replies = [f.result() for f in done if f.exception() is None]
+        errors = [str(f.exception()) for f in done
+                  if isinstance(f.exception(), RuntimeError)]
+        if not replies:
+            self.Stats = None
+            raise ValueError('No worker replied before the deadline.'
+                             + ''.join(' ' + e for e in errors[:1]))
+        lastReply = max(arrival for _, arrival in replies)
+        plays = np.sum([reply['plays'] for reply, _ in replies], axis=0)
+        values = np.sum([reply['values'] for reply, _ in replies], axis=0)
+        finish = time()
+
+        playouts = sum(reply['playouts'] for reply, _ in replies)
+        self.Stats = {'workers': len(replies),
+                      'failed': len(self.Addresses) - len(replies),
+                      'errors': errors,
+                      'playouts': playouts,
+                      'elapsed': finish - start,
+                      'playoutsPerSecond': playouts / (finish - start),
+                      'mergeLatency': finish - lastReply}
+        return plays, values
+
+    def FindMove(self, state, temp=0, moveTime=None, playLimit=None,
+                 deadline=None):
+        """ Finds a move with a root-parallel search.
+
+            With temp 0, the legal action with the best merged win rate is
+            chosen. Otherwise actions are sampled in proportion to
+            plays ** (1 / temp).
+
+            Returns:
+                The same tuple as MCTS.FindMove: the GameState after the
+                    move, the merged root win rate and the visit share of
+                    each action.
+        """
+        plays, values = self.Search(state, temp, moveTime, playLimit,
+                                    deadline)
+        legal = state.LegalActions() == 1
+        winRates = np.divide(values, plays, out=np.zeros(len(plays)),
+                             where=plays > 0)
+        if temp == 0:
+            action = int(np.argmax(np.where(legal, winRates, -np.inf)))
+        else:
+            p = np.cumsum(np.where(legal, plays ** (1 / temp), 0))
+            if p[-1] == 0:
+                p = np.cumsum(legal)
+            action = int(np.searchsorted(p, self.Rng.random() * p[-1],
+                                         side='right'))
+
+        total = plays.sum()
+        nextState = state.Copy()
+        nextState.ApplyAction(action)
+        return (nextState, values.sum() / total if total > 0 else 0,
+                plays / total if total > 0 else plays)
+
+    def Close(self):
+        self._executor.shutdown(wait=False)
+
+    def _request(self, address, endTime, job):
+        """ Sends one job and waits for its reply until endTime.
+
+            The job is sent once the worker is ready, with the seconds left
+            until endTime as its budget.
+
+            Returns:
+                A tuple of the reply and the time it arrived.
+
+            Raises:
+                RuntimeError: The worker replied with an error.
+        """
+        with socket.create_connection(address,
+                                      timeout=max(endTime - time(), 0.001)) \
+                as sock:
+            sock.settimeout(max(endTime - time(), 0.001))
+            ReceiveMessage(sock)
+            SendMessage(sock, dict(job, budget=endTime - time()))
+            sock.settimeout(max(endTime - time(), 0.001))
+            reply = ReceiveMessage(sock)
+        if 'error' in reply:
+            raise RuntimeError(reply['error'])
+        return reply, time()
+
+
+if __name__ == '__main__':
+    host = sys.argv[1] if len(sys.argv) > 1 else '127.0.0.1'
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    worker = SearchWorker(partial(DynamicMCTS, explorationRate=1), host, port)
+    print('Serving on {}:{}'.format(*worker.Address))
+    worker.Serve()
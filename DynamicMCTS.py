@@ -1,5 +1,4 @@
 from .MCTS import MCTS, Node
-import numpy as np
 
 class DynamicMCTS(MCTS):
     """ An extension of the MCTS class that aggregates statistics as it
@@ -19,16 +18,16 @@ class DynamicMCTS(MCTS):
                 temp: The temperature to apply to action selection after tree
                     search has been applied to the node.
         """
-        lastAction = None
         while True:
+            if node is not self.Root and self._isEndgameLeaf(node):
+                break
             if node.Children is None:
-                if node.State.Winner(lastAction) is not None:
+                if node.Terminal:
                     break
                 self.AddChildren(node)
                 break
-            if np.sum(node.LegalActions) == 0:
+            if node.Terminal:
                 break
-            lastAction = self._selectAction(node, temp)
-            node = node.Children[lastAction]
+            node = node.Children[self._selectAction(node, temp)]
 
         return node
@@ -0,0 +1,194 @@
+import numpy as np
+
+
+class EndgameSolver(object):
+    """ Exact negamax search with alpha-beta pruning for small endgames.
+
+        Solves positions through the GameState interface only (LegalActions,
+        Copy/ApplyAction and Winner), so it works for any game that MCTS can
+        search. Scores are from the perspective of the player to move: 1 for a
+        forced win, 0 for a draw and -1 for a forced loss.
+
+        Attributes:
+            Table: A dict transposition table mapping GameState.Key() of a
+                state to a tuple of (score, bound flag, best action).
+            MaxTableSize: The number of entries at which Table is cleared.
+            Symmetry: A boolean toggle for keying Table on the Key of
+                GameState.CanonicalForm, so symmetric states share an entry.
+                Best actions are then stored in canonical coordinates.
+            Nodes: A counter holding the number of positions searched.
+    """
+
+    Exact = 0
+    Lower = 1
+    Upper = 2
+
+    def __init__(self, maxTableSize=200000, symmetry=False):
+        self.Table = {}
+        self.MaxTableSize = maxTableSize
+        self.Symmetry = symmetry
+        self.Nodes = 0
+        self._orders = {}
+
+    def Solve(self, state, prevAction=None):
+        """ Finds the exact score of a state.
+
+            Args:
+                state: A GameState object to solve.
+                prevAction: An optional int holding the action which led to
+                    state. It lets Winner check only the lines through it.
+
+            Returns:
+                An int score for the player to move in state: 1 for a win, 0
+                for a draw and -1 for a loss.
+        """
+        return self._negamax(state, state.Winner(prevAction), -1, 1)
+
+    def Value(self, state, player, prevAction=None):
+        """ Finds the exact value of a state for a specified player.
+
+            Args:
+                state: A GameState object to solve.
+                player: An integer representing the player to value state for.
+                prevAction: An optional int holding the action which led to
+                    state.
+
+            Returns:
+                A float in the same convention as MCTS.SampleValue: 0 for a
+                    loss, 1 for a win and 0.5 for a draw.
+        """
+        score = self.Solve(state, prevAction)
+        if player != state.Player:
+            score = -score
+        return (score + 1) / 2
+
+    def BestAction(self, state):
+        """ Finds an optimal action in a state.
+
+            Args:
+                state: A GameState object with at least one legal action.
+
+            Returns:
+                An int representing the index of an optimal action.
+        """
+        self.Solve(state)
+        key, actionMap = self._key(state)
+        entry = self.Table.get(key)
+        if entry is not None and entry[2] is not None:
+            return self._fromKeyAction(entry[2], actionMap)
+        return int(np.where(state.LegalActions() == 1)[0][0])
+
+    def Clear(self):
+        """ Empties the transposition table.
+        """
+        self.Table.clear()
+
+    def _negamax(self, state, winner, alpha, beta):
+        """ Searches a state with alpha-beta pruning.
+
+            Args:
+                state: A GameState object to search.
+                winner: The result of state.Winner(), or None if the game is
+                    not over.
+                alpha: The lower bound of the search window.
+                beta: The upper bound of the search window.
+
+            Returns:
+                An int score for the player to move in state.
+        """
+        self.Nodes += 1
+        if winner is not None:
+            if winner == 0:
+                return 0
+            return 1 if winner == state.Player else -1
+
+        alphaOrig = alpha
+        key, actionMap = self._key(state)
+        entry = self.Table.get(key)
+        bestAction = None
+        if entry is not None:
+            score, flag, bestAction = entry
+            bestAction = self._fromKeyAction(bestAction, actionMap)
+            if flag == EndgameSolver.Exact:
+                return score
+            elif flag == EndgameSolver.Lower:
+                alpha = max(alpha, score)
+            else:
+                beta = min(beta, score)
+            if alpha >= beta:
+                return score
+
+        legalActions = state.LegalActions()
+        children = []
+        for action in self._moveOrder(legalActions, bestAction):
+            child = state.Copy()
+            child.ApplyAction(action)
+            childWinner = child.Winner(action)
+            if childWinner is not None and childWinner == state.Player:
+                self._store(key, actionMap, 1, EndgameSolver.Exact, action)
+                return 1
+            children.append((action, child, childWinner))
+
+        best = -2
+        for action, child, childWinner in children:
+            score = -self._negamax(child, childWinner, -beta, -alpha)
+            if score > best:
+                best = score
+                bestAction = action
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                break
+
+        if best <= alphaOrig:
+            flag = EndgameSolver.Upper
+        elif best >= beta:
+            flag = EndgameSolver.Lower
+        else:
+            flag = EndgameSolver.Exact
+        self._store(key, actionMap, best, flag, bestAction)
+        return best
+
+    def _moveOrder(self, legalActions, firstAction=None):
+        """ Orders the legal actions of a state for searching.
+
+            The best action found by an earlier search of the state comes
+            first, followed by the rest ordered from the center of the action
+            space outwards.
+
+            Args:
+                legalActions: A numpy array mask of legal actions.
+                firstAction: An optional int action to search first.
+
+            Returns:
+                A list of ints representing legal actions in search order.
+        """
+        n = len(legalActions)
+        order = self._orders.get(n)
+        if order is None:
+            order = sorted(range(n), key=lambda a: abs(a - (n - 1) / 2))
+            self._orders[n] = order
+        actions = [a for a in order if legalActions[a] == 1]
+        if firstAction is not None and firstAction in actions:
+            actions.remove(firstAction)
+            actions.insert(0, firstAction)
+        return actions
+
+    def _key(self, state):
+        """ Finds the Table key of a state and its action map.
+        """
+        if self.Symmetry:
+            canonical, actionMap = state.CanonicalForm()
+            return canonical.Key(), actionMap
+        return state.Key(), None
+
+    def _fromKeyAction(self, action, actionMap):
+        if action is None or actionMap is None:
+            return action
+        return int(np.where(actionMap == action)[0][0])
+
+    def _store(self, key, actionMap, score, flag, bestAction):
+        if len(self.Table) >= self.MaxTableSize:
+            self.Table.clear()
+        if bestAction is not None and actionMap is not None:
+            bestAction = int(actionMap[bestAction])
+        self.Table[key] = (score, flag, bestAction)
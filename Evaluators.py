@@ -0,0 +1,80 @@
+import numpy as np
+from .WinningLines import WinningLines
+
+
+class StaticEvaluator(object):
+    """ Base class for scoring positions without playing them out.
+
+        Evaluators are called by MCTS.SampleValue when a rollout is cut off
+        after RolloutDepth plies. Any callable with the signature of __call__
+        can be used instead of a subclass.
+    """
+
+    def __call__(self, state, player):
+        """ Scores a state for a specified player.
+
+            Args:
+                state: A GameState object to score.
+                player: An integer representing the player to score state for.
+
+            Returns:
+                A float in the same convention as MCTS.SampleValue: 0 for a
+                    loss, 1 for a win and 0.5 for an even position.
+        """
+        raise NotImplementedError
+
+
+class ThreatEvaluator(StaticEvaluator):
+    """ Scores k-in-a-row positions by counting open lines.
+
+        A line is open for a player if the opponent has no stone on it. Each
+        open line is weighted by how many of the player's stones it holds, so
+        lines one stone short of a win (threats) dominate. The difference of
+        the players' scores is squashed into [0, 1] with a logistic. Works on
+        any state that implements GameState.LineGeometry, such as Connect4.
+
+        Attributes:
+            Weights: A numpy array holding the weight of an open line with
+                index stones on it, for 0 to inARow - 1 stones. Defaults to
+                powers of 4 up to inARow - 1 stones.
+            Scale: The logistic scale applied to the score difference.
+    """
+
+    def __init__(self, weights=None, scale=0.05):
+        self.Weights = None if weights is None else np.asarray(weights)
+        self.Scale = scale
+
+    def __call__(self, state, player):
+        boards = state.AsInputArray()[:, :, :, :2]
+        value = self.Evaluate(boards, state.LineGeometry()[2])[0]
+        return value if player == 1 else 1 - value
+
+    def Evaluate(self, boards, inARow):
+        """ Scores a batch of boards for player 1.
+
+            Args:
+                boards: A numpy array of shape [batch, rows, cols, 2] holding
+                    each player's stones, as in GameState.AsInputArray.
+                inARow: The number of stones in a row needed to win.
+
+            Returns:
+                A numpy array of shape [batch] of values for player 1. Boards
+                    where a player has completed a line are scored 0 or 1.
+        """
+        batch, rows, cols, _ = boards.shape
+        lines = WinningLines.ForGeometry(rows, cols, inARow).Lines
+        cells = boards.reshape(batch, rows * cols, 2)
+        counts1 = cells[:, :, 0][:, lines].sum(axis=2).astype(np.int64)
+        counts2 = cells[:, :, 1][:, lines].sum(axis=2).astype(np.int64)
+
+        weights = self.Weights
+        if weights is None:
+            weights = 4.0 ** np.arange(inARow)
+            weights[0] = 0
+        weights = np.append(weights, 0)
+        score1 = np.where(counts2 == 0, weights[counts1], 0).sum(axis=1)
+        score2 = np.where(counts1 == 0, weights[counts2], 0).sum(axis=1)
+        value = 1 / (1 + np.exp(-self.Scale * (score1 - score2)))
+
+        value = np.where((counts2 == inARow).any(axis=1), 0.0, value)
+        return np.where((counts1 == inARow).any(axis=1), 1.0, value)
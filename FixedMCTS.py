@@ -1,34 +1,32 @@
 from .MCTS import MCTS, Node
-import numpy as np
 
 class FixedMCTS(MCTS):
     """ An implementation of Monte Carlo Tree Search that only aggregates 
         statistics up to a fixed depth.
+
+        maxDepth bounds the tree; rolloutDepth and evaluator (see MCTS) bound
+        the rollout below it, so the cost of a playout is fixed.
     """
     def __init__(self, **kwargs):
         self.MaxDepth = kwargs.get('maxDepth')
-        explorationRate = kwargs.get('explorationRate')
-        timeLimit = kwargs.get('timeLimit')
-        playLimit = kwargs.get('playLimit')
         threads = kwargs.get('threads', 1) 
 
         if self.MaxDepth <= 0:
             raise ValueError('MaxDepth for MCTS must be > 0.')
 
-        super().__init__(explorationRate, timeLimit, playLimit)
+        super().__init__(**kwargs)
 
     # Overriding from MCTS
     def _findLeaf(self, node, temp):
-        lastAction = None
         for _ in range(self.MaxDepth):
+            if node is not self.Root and self._isEndgameLeaf(node):
+                break
             if node.Children is None:
-                if node.State.Winner(lastAction) is not None:
+                if node.Terminal:
                     break
                 self.AddChildren(node)
-            if np.sum(node.LegalActions) == 0:
+            if node.Terminal:
                 break
-            lastAction = self._selectAction(node, temp)
-            node = node.Children[lastAction]
-        assert lastAction is not None, 'There is at least one legal option.'
+            node = node.Children[self._selectAction(node, temp)]
 
         return node
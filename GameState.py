@@ -1,3 +1,6 @@
+import numpy as np
+
+
 class GameState(object):
     def __init__(self):
         self.Board = None
@@ -8,6 +11,15 @@ class GameState(object):
         raise NotImplementedError
 
     def LegalActions(self):
+        """ Gets the legal action mask.
+
+            States should keep the mask and update it in ApplyAction rather
+            than rebuild it on every call. Callers must not modify it.
+
+            Returns:
+                A numpy array of size [num_actions] holding 1 for legal
+                    actions and 0 otherwise.
+        """
         raise NotImplementedError
 
     def LegalActionShape(self):
@@ -16,9 +28,77 @@ class GameState(object):
     def ApplyAction(self, action):
         raise NotImplementedError
 
+    def RandomAction(self, rng=np.random):
+        """ Picks a uniformly random legal action.
+
+            The default scans LegalActions. States that track their empty
+            cells can override it with an O(1) draw.
+
+            Args:
+                rng: An object with a random() method, such as a numpy
+                    Generator, np.random or a RandomPool.
+        """
+        actions = np.where(self.LegalActions() == 1)[0]
+        return actions[int(rng.random() * len(actions))]
+
     def Winner(self, prevAction=None):
+        """ Gets the result of the game.
+
+            States should find the result once per move in ApplyAction, in
+            which case prevAction is ignored.
+
+            Returns:
+                None if the game is not over, 0 for a draw or the winning
+                    player.
+        """
         raise NotImplementedError
 
+    def IsTerminal(self):
+        """ Checks whether the game is over.
+        """
+        return self.Winner() is not None
+
+    def MovesRemaining(self):
+        raise NotImplementedError
+
+    def LineGeometry(self):
+        """ Describes a k-in-a-row board for WinningLines-based helpers.
+
+            Returns:
+                A tuple of (rows, cols, inARow, gravity). Cells are numbered
+                    row-major. With gravity an action is a column and the
+                    stone lands on its lowest empty row, otherwise an action
+                    is a cell.
+        """
+        raise NotImplementedError
+
+    def CanonicalForm(self):
+        """ Maps the state to a canonical representative of its symmetries.
+
+            Symmetric states must map to equal canonical states. The action
+            map translates actions (and priors) of this state into actions of
+            the canonical state: action a here is action actionMap[a] there,
+            so canonicalPriors[actionMap] = priors.
+
+            Returns:
+                A tuple of the canonical GameState and a numpy int array
+                    actionMap, or None for actionMap if the state is already
+                    canonical. The default has no symmetries.
+        """
+        return self, None
+
+    def Key(self):
+        """ Gets a compact hashable key for the state.
+
+            Equal states must have equal keys. Tables such as the endgame
+            solver's keep keys instead of whole states, so they should be
+            small. The default packs Player and Board.
+
+            Returns:
+                A hashable object.
+        """
+        return self.Player, self.Board.tobytes()
+
     def NumericRepresentation(self):
         raise NotImplementedError
 
@@ -0,0 +1,179 @@
+from .GameState import GameState
+from .WinningLines import CanonicalSymmetry, WinningLines
+import numpy as np
+
+
+class BoardState(GameState):
+    """ A k-in-a-row game on an NxN board, stored as integer bitsets.
+
+        Each player's stones are one arbitrary-width int with bit
+        row * Size + col set for every stone. For each cell, the masks of all
+        winning lines through it are precomputed once per (Size, InARow), so
+        ApplyAction detects a win by testing at most 4 * InARow masks. The
+        empty cells are kept in a list with an index, which makes
+        RandomAction O(1), and in the legal action mask.
+
+        Attributes:
+            Size: The board width and height.
+            InARow: The number of stones in a row needed to win.
+            Stones: A list holding the bitset of player 1 and of player 2.
+    """
+    Players = {0: ' ', 1: 'X', 2: 'O'}
+    _tables = {}
+
+    def __init__(self, size=15, inARow=5):
+        self.Size = size
+        self.InARow = inARow
+        self.Player = 1
+        self.PreviousPlayer = None
+        self.Stones = [0, 0]
+        self._cellMasks = self._lineMasks(size, inARow)
+        self._empty = list(range(size * size))
+        self._emptyIndex = list(range(size * size))
+        self._legal = np.ones(size * size)
+        self._winner = None
+
+    def Copy(self):
+        copy = BoardState.__new__(BoardState)
+        copy.Size = self.Size
+        copy.InARow = self.InARow
+        copy.Player = self.Player
+        copy.PreviousPlayer = self.PreviousPlayer
+        copy.Stones = list(self.Stones)
+        copy._cellMasks = self._cellMasks
+        copy._empty = list(self._empty)
+        copy._emptyIndex = list(self._emptyIndex)
+        copy._legal = np.copy(self._legal)
+        copy._winner = self._winner
+        return copy
+
+    @property
+    def Board(self):
+        board = np.zeros((self.Size * self.Size, 2), dtype=np.int8)
+        board[:, 0] = self._bits(self.Stones[0])
+        board[:, 1] = self._bits(self.Stones[1])
+        return board.reshape(self.Size, self.Size, 2)
+
+    def LegalActions(self):
+        return self._legal
+
+    def LegalActionShape(self):
+        return np.array([self.Size * self.Size], dtype=np.int64)
+
+    def RandomAction(self, rng=np.random):
+        return self._empty[int(rng.random() * len(self._empty))]
+
+    def ApplyAction(self, action):
+        action = int(action)
+        bit = 1 << action
+        if (self.Stones[0] | self.Stones[1]) & bit:
+            raise ValueError('Tried to make an illegal move.')
+
+        stones = self.Stones[self.Player - 1] | bit
+        self.Stones[self.Player - 1] = stones
+        i = self._emptyIndex[action]
+        last = self._empty.pop()
+        if last != action:
+            self._empty[i] = last
+            self._emptyIndex[last] = i
+        self._emptyIndex[action] = -1
+        self._legal[action] = 0
+
+        for mask in self._cellMasks[action]:
+            if stones & mask == mask:
+                self._winner = self.Player
+                break
+        else:
+            if not self._empty:
+                self._winner = 0
+
+        self.PreviousPlayer = self.Player
+        self.Player = 1 if self.Player == 2 else 2
+
+    def AsInputArray(self):
+        player = np.full((self.Size, self.Size), 1 if self.Player == 1 else -1)
+        array = np.zeros((1, self.Size, self.Size, 3), dtype=np.int8)
+        array[0, :, :, 0:2] = self.Board
+        array[0, :, :, 2] = player
+        return array
+
+    def Winner(self, prevAction=None):
+        return self._winner
+
+    def MovesRemaining(self):
+        return len(self._empty)
+
+    def LineGeometry(self):
+        return self.Size, self.Size, self.InARow, False
+
+    def CanonicalForm(self):
+        owners = self._owners()
+        gather, actionMap = CanonicalSymmetry(owners, self.Size)
+        if gather is None:
+            return self, None
+        canonical = self.Copy()
+        owners = owners[gather]
+        canonical.Stones = [self._fromBits(owners == 1),
+                            self._fromBits(owners == 2)]
+        canonical._empty = [int(c) for c in np.where(owners == 0)[0]]
+        canonical._emptyIndex = [-1] * (self.Size * self.Size)
+        for i, cell in enumerate(canonical._empty):
+            canonical._emptyIndex[cell] = i
+        canonical._legal = self._legal[gather]
+        return canonical, actionMap
+
+    def Key(self):
+        return self.Player, self.Stones[0], self.Stones[1]
+
+    def _bits(self, stones):
+        """ Unpacks a bitset into a numpy array of 0/1 per cell.
+        """
+        n = self.Size * self.Size
+        data = np.frombuffer(stones.to_bytes((n + 7) // 8, 'little'),
+                             dtype=np.uint8)
+        return np.unpackbits(data, bitorder='little')[:n]
+
+    def _fromBits(self, cells):
+        """ Packs a boolean array of cells into a bitset.
+        """
+        return int.from_bytes(np.packbits(cells, bitorder='little').tobytes(),
+                              'little')
+
+    def _owners(self):
+        return (self._bits(self.Stones[0])
+                + 2 * self._bits(self.Stones[1])).astype(np.int8)
+
+    @classmethod
+    def _lineMasks(cls, size, inARow):
+        """ Gets, for each cell, the bitmasks of the winning lines through it.
+        """
+        key = (size, inARow)
+        masks = cls._tables.get(key)
+        if masks is None:
+            table = WinningLines.ForGeometry(size, size, inARow)
+            lineMasks = [sum(1 << cell for cell in line)
+                         for line in table.LineCells]
+            masks = tuple(tuple(lineMasks[l] for l in lines)
+                          for lines in table.CellLines)
+            cls._tables[key] = masks
+        return masks
+
+    def __str__(self):
+        owners = self._owners().reshape(self.Size, self.Size)
+        s = ''
+        for i in range(self.Size):
+            s += '[ '
+            for j in range(self.Size):
+                s += ' {} '.format(BoardState.Players[owners[i, j]])
+                if j < self.Size - 1:
+                    s += '|'
+            s += ']\n'
+        return s
+
+    def __eq__(self, other):
+        if other.Player != self.Player:
+            return False
+        return other.Stones == self.Stones
+
+    def __hash__(self):
+        return hash((self.Player, self.Stones[0], self.Stones[1]))
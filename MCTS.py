@@ -1,6 +1,12 @@
 import numpy as np
 from time import time
+from .EndgameSolver import EndgameSolver
+from .Evaluators import ThreatEvaluator
 from .GameState import GameState
+from .RandomPool import RandomPool
+from .RolloutPolicies import RandomPolicy
+from .SelectionPolicies import PUCTPolicy
+from .TreeStats import ExportTree, TreeArrays, TreeSummary
 
 
 class Node(object):
@@ -20,11 +26,39 @@ class Node(object):
             Priors: A numpy array of size [num_legal_actions] that holds the
                 Node's prior probabilities.  At instantiation, the provided
                 prior is filtered on only legal moves.
-
-            _childWinRates: A numpy array of size [num_legal_actions] used for
+            ProvenValue: A float holding the exact value of the Node found by
+                the endgame solver, or None if the Node has not been solved.
+            Winner: The result of State.Winner() when the Node was created:
+                None if the game is not over, 0 for a draw or the winner.
+            Terminal: A boolean that is True if the game is over at State.
+            Action: An int holding the action that led from Parent to the Node,
+                or None for a Node created as a root.
+            Actions: A numpy int array holding the action of each child slot,
+                set on expansion. Slots are the actions themselves unless the
+                Node is progressively widened, in which case there is one slot
+                per active child.
+
+            _childWinRates: A numpy array of size [num_slots] used for
                 storing the win rates of the Node's children in MCTS.
-            _childPlays: A numpy array of size [num_legal_actions] used for
-                storing the play counts of the Node's children in MCTS.
+            _childPlays: A numpy array of size [num_slots] holding the play
+                count of each child, updated by MCTS._backProp.
+            _childTotals: A numpy array of size [num_slots] holding the total
+                value of each child, updated by MCTS._backProp.
+            _childSquares: A numpy array of size [num_slots] holding the total
+                squared value of each child, updated by MCTS._backProp.
+            _childPriors: A numpy array of size [num_slots] of the prior of
+                each slot's action.
+            _childMask: A numpy array of size [num_slots] holding 0 for legal
+                slots and -inf for illegal ones and for the duplicates of a
+                merged symmetric child, added to selection scores.
+            _slot: The slot of Parent whose statistics this Node updates. A
+                merged symmetric child keeps the slot of its first action.
+            _childAmafValues: A numpy array of size [num_legal_actions] used
+                for storing the all-moves-as-first value totals of each action
+                in RAVE. Allocated on the first RAVE update.
+            _childAmafPlays: A numpy array of size [num_legal_actions] used for
+                storing the all-moves-as-first play counts of each action in
+                RAVE. Allocated on the first RAVE update.
     """
 
     def __init__(self, state, legalActions, priors, **kwargs):
@@ -35,9 +69,24 @@ class Node(object):
         self.Children = None
         self.Parent = None
         self.Priors = np.multiply(priors, legalActions)
-
-        self._childWinRates = np.zeros(len(legalActions))
-        self._childPlays = np.zeros(len(legalActions), dtype=np.float)
+        self.ProvenValue = None
+        self.Winner = state.Winner()
+        self.Terminal = state.IsTerminal()
+        self.Action = None
+        self.Actions = None
+
+        self._canonicalSlots = None
+        self._wideningOrder = None
+
+        self._childWinRates = None
+        self._childPlays = None
+        self._childTotals = None
+        self._childSquares = None
+        self._childPriors = None
+        self._childMask = None
+        self._slot = None
+        self._childAmafValues = None
+        self._childAmafPlays = None
 
     def WinRate(self):
         """ Samples the win rate of the Node after MCTS.
@@ -58,13 +107,16 @@ class Node(object):
             If no children have been sampled in MCTS, this returns zeros.
 
             Returns:
-                A numpy array representing the play rate for each of the Node's
-                children. Defaults to an array of zeros if no children have been
-                sampled.
+                A numpy array of size [num_legal_actions] representing the play
+                rate for each of the Node's actions. Defaults to an array of
+                zeros if no children have been sampled.
         """
-        allPlays = sum(self.ChildPlays())
-        zeroProbs = np.zeros((len(self.ChildPlays())), dtype=np.float)
-        return self.ChildPlays() / allPlays if allPlays > 0 else zeroProbs
+        plays = self.ChildPlays()
+        allPlays = plays.sum()
+        probs = np.zeros(len(self.LegalActions), dtype=np.float64)
+        if allPlays > 0:
+            np.add.at(probs, self.Actions, plays / allPlays)
+        return probs
 
     def ChildWinRates(self):
         """ Samples the win rate of each child Node object.
@@ -76,11 +128,24 @@ class Node(object):
                 A numpy array representing the win rate for each of the Node's
                 children.
         """
-        for i in range(len(self.Children)):
-            if self.Children[i] is not None:
-                self._childWinRates[i] = self.Children[i].WinRate()
+        np.maximum(self._childPlays, 1, out=self._childWinRates)
+        np.divide(self._childTotals, self._childWinRates,
+                  out=self._childWinRates)
         return self._childWinRates
 
+    def ChildAmafWinRates(self):
+        """ Samples the all-moves-as-first win rate of each action.
+
+            Returns:
+                A numpy array representing the AMAF win rate of each of the
+                Node's actions. Actions without AMAF samples have a rate of 0.
+        """
+        if self._childAmafPlays is None:
+            return np.zeros(len(self.LegalActions))
+        return np.divide(self._childAmafValues, self._childAmafPlays,
+                         out=np.zeros(len(self._childAmafPlays)),
+                         where=self._childAmafPlays > 0)
+
     def ChildPlays(self):
         """ Samples the play rate of each child Node object.
 
@@ -91,9 +156,6 @@ class Node(object):
                 A numpy array representing the play rate for each of the Node's
                 children.
         """
-        for i in range(len(self.Children)):
-            if self.Children[i] is not None:
-                self._childPlays[i] = self.Children[i].Plays
         return self._childPlays
 
 
@@ -107,15 +169,89 @@ class MCTS(object):
             TimeLimit: The default max move time in seconds.
             PlayLimit: The default number of positions to evaluate per move.
             ExplorationRate: The exploration parameter for MCTS.
+            EndgameThreshold: The number of remaining moves at or below which
+                leaves are solved exactly instead of rolled out, or None to
+                always roll out.
+            Solver: The EndgameSolver used for leaves within EndgameThreshold.
+            Symmetry: A boolean toggle for merging children that are symmetric
+                under GameState.CanonicalForm into a single shared Node.
+            Rave: A boolean toggle for blending all-moves-as-first statistics
+                into the child values used by _selectAction.
+            RaveEquivalence: The number of plays at which the UCT and AMAF
+                values of a child are weighted equally in RAVE mode.
+            SelectionPolicy: The SelectionPolicy that scores children in
+                _selectAction. Defaults to a PUCTPolicy.
+            RolloutPolicy: The RolloutPolicy that chooses moves in SampleValue.
+            RolloutDepth: The number of plies after which a rollout is cut off
+                and scored by Evaluator, or None to play rollouts to the end.
+            Evaluator: A callable (state, player) -> value used to score cut
+                off rollouts. Defaults to a ThreatEvaluator.
+            RootSearch: 'uct' to select every action with _selectAction, or
+                'halving' to split the root's playout budget with sequential
+                halving. Below the root, _findLeaf is used either way.
+            Gumbel: A boolean toggle for sampling the halving candidates
+                without replacement from the Priors with the Gumbel-top-k
+                trick, and adding the Gumbel noise to their scores.
+            HalvingWidth: The number of candidates sampled when Gumbel is
+                set.
+            Widening: A boolean toggle for progressive widening. A widened
+                Node only has children for its first k actions in
+                WideningHeuristic order, where
+                k = ceil(WideningBase * (Plays + 1) ** WideningExponent).
+            WideningBase: The number of children of an unvisited widened Node.
+            WideningExponent: The growth rate of k with the Node's Plays.
+            WideningHeuristic: 'priors' to order actions by Priors, or
+                'locality' to order them by the number of stones next to
+                their cell, which needs GameState.LineGeometry. The other
+                key breaks ties, when the state has a LineGeometry, so
+                uniform priors still open near the stones or the centre.
+            Rng: The numpy Generator owned by this search, seeded from seed.
+            Randoms: A RandomPool filled from Rng that serves the uniform draws
+                of the rollouts and of temperature selection.
             Root: The Node object representing the root of the MCTS.
     """
 
     def __init__(self, explorationRate, timeLimit=None, playLimit=None,
-                 **kwargs):
+                 endgameThreshold=None, symmetry=False, rave=False,
+                 raveEquivalence=100, rolloutPolicy=None, rolloutDepth=None,
+                 evaluator=None, rootSearch='uct', gumbel=False,
+                 halvingWidth=16, widening=False, wideningBase=2,
+                 wideningExponent=0.5, wideningHeuristic='priors', seed=None,
+                 selectionPolicy=None, **kwargs):
+        if rolloutDepth is not None and rolloutDepth < 0:
+            raise ValueError('RolloutDepth for MCTS must be >= 0.')
+        if rootSearch not in ('uct', 'halving'):
+            raise ValueError('RootSearch must be \'uct\' or \'halving\'.')
+        if wideningHeuristic not in ('priors', 'locality'):
+            raise ValueError(
+                'WideningHeuristic must be \'priors\' or \'locality\'.')
 
         self.TimeLimit = timeLimit
         self.PlayLimit = playLimit
         self.ExplorationRate = explorationRate
+        self.EndgameThreshold = endgameThreshold
+        self.Symmetry = symmetry
+        self.Rave = rave
+        self.RaveEquivalence = raveEquivalence
+        self.SelectionPolicy = (selectionPolicy if selectionPolicy is not None
+                                else PUCTPolicy())
+        self.RolloutPolicy = (rolloutPolicy if rolloutPolicy is not None
+                              else RandomPolicy())
+        self.RolloutDepth = rolloutDepth
+        self.Evaluator = evaluator if evaluator is not None else ThreatEvaluator()
+        self.RootSearch = rootSearch
+        self.Gumbel = gumbel
+        self.HalvingWidth = halvingWidth
+        self.Widening = widening
+        self.WideningBase = wideningBase
+        self.WideningExponent = wideningExponent
+        self.WideningHeuristic = wideningHeuristic
+        self.Solver = (EndgameSolver(symmetry=symmetry)
+                       if endgameThreshold is not None else None)
+        self._seedSequence = np.random.SeedSequence(seed)
+        self.Rng = np.random.default_rng(self._seedSequence)
+        self.Randoms = RandomPool(self.Rng)
+        self.RolloutPolicy.Random = self.Randoms
         self.Root = None
 
     def AddChildren(self, node):
@@ -125,23 +261,168 @@ class MCTS(object):
             The evaluation and prior policy are supplied in the creation of the
             child Node object.
 
+            With Symmetry enabled, actions leading to symmetric states share
+            the Node of the first such action, which pools their statistics
+            in that action's slot. The priors of the merged actions are added
+            to that first action, and their own slots are masked out, so each
+            playout is counted once.
+
+            With Widening enabled, only the first children in widening order
+            are added, and _selectAction adds more as the node is played.
+
             Args:
                 node: A Node object to expand.
         """
+        node._canonicalSlots = {} if self.Symmetry else None
+        if self.Widening:
+            node._wideningOrder = self._wideningOrder(node)
+            node.Actions = np.zeros(0, dtype=np.int64)
+            node.Children = []
+            node._childWinRates = np.zeros(0)
+            node._childPlays = np.zeros(0)
+            node._childTotals = np.zeros(0)
+            node._childSquares = np.zeros(0)
+            node._childMask = np.zeros(0)
+            self._widen(node)
+            return
+
         numLegalMoves = len(node.LegalActions)
+        node.Actions = np.arange(numLegalMoves)
         node.Children = [None] * numLegalMoves
+        node._childWinRates = np.zeros(numLegalMoves)
+        node._childPlays = np.zeros(numLegalMoves)
+        node._childTotals = np.zeros(numLegalMoves)
+        node._childSquares = np.zeros(numLegalMoves)
+        node._childPriors = node.Priors
+        node._childMask = np.where(node.LegalActions == 1, 0.0, -np.inf)
         for actionIndex in range(numLegalMoves):
             if node.LegalActions[actionIndex] == 1:
-                s = self._applyAction(node.State, actionIndex)
-                node.Children[actionIndex] = Node(s, s.LegalActions(),
-                                                  self.GetPriors(s))
-                node.Children[actionIndex].Parent = node
+                self._addChild(node, actionIndex)
+        node._canonicalSlots = None
+
+    def _addChild(self, node, slot):
+        """ Creates the child Node for a slot of an expanded node.
+
+            Args:
+                node: A Node object whose Actions and Children hold the slot.
+                slot: An int index into node.Children.
+        """
+        action = node.Actions[slot]
+        s = self._applyAction(node.State, action)
+        if node._canonicalSlots is not None:
+            canonical = s.CanonicalForm()[0]
+            first = node._canonicalSlots.setdefault(canonical, slot)
+            if first != slot:
+                node.Children[slot] = node.Children[first]
+                node._childMask[slot] = -np.inf
+                node.Priors[node.Actions[first]] += node.Priors[action]
+                node.Priors[action] = 0
+                return
+        child = Node(s, s.LegalActions(), self.GetPriors(s))
+        child.Parent = node
+        child.Action = action
+        child._slot = slot
+        node.Children[slot] = child
+
+    def _wideningOrder(self, node):
+        """ Orders the legal actions of a node for progressive widening.
+
+            The primary key is WideningHeuristic and the other one breaks
+            ties. States without a LineGeometry are ordered by Priors alone,
+            then by action.
+
+            Args:
+                node: A Node object to order the actions of.
+
+            Returns:
+                A numpy int array of the node's legal actions, best first.
+        """
+        legal = np.where(node.LegalActions == 1)[0]
+        priors = -node.Priors[legal]
+        try:
+            locality = -self._localityScores(node.State)[legal]
+        except NotImplementedError:
+            if self.WideningHeuristic == 'locality':
+                raise
+            return legal[np.argsort(priors, kind='stable')]
+        if self.WideningHeuristic == 'locality':
+            return legal[np.lexsort([priors, locality])]
+        return legal[np.lexsort([locality, priors])]
+
+    def _localityScores(self, state):
+        """ Scores each action by the stones around the cell it fills.
+
+            Each score counts the stones in the 3x3 neighbourhood of the
+            action's cell, less a small distance-to-centre term that breaks
+            ties on an empty board.
+
+            Args:
+                state: A GameState object implementing LineGeometry.
+
+            Returns:
+                A numpy array of size [num_legal_actions] of scores.
+        """
+        rows, cols, _, gravity = state.LineGeometry()
+        stones = state.AsInputArray()[0, :, :, :2].sum(axis=2)
+        padded = np.pad(stones, 1)
+        near = sum(padded[1 + dr:rows + 1 + dr, 1 + dc:cols + 1 + dc]
+                   for dr in (-1, 0, 1) for dc in (-1, 0, 1))
+        r, c = np.mgrid[0:rows, 0:cols]
+        near = near - 1e-3 * (np.abs(r - (rows - 1) / 2)
+                              + np.abs(c - (cols - 1) / 2))
+        if gravity:
+            heights = np.minimum(stones.sum(axis=0).astype(np.int64), rows - 1)
+            return near[heights, np.arange(cols)]
+        return near.ravel()
+
+    def _widen(self, node, target=None):
+        """ Adds children to a widened node until it has k of them.
+
+            Args:
+                node: A Node object expanded in Widening mode.
+                target: (optional) The number of children to have instead of
+                    k, capped at the number of legal actions.
+        """
+        order = node._wideningOrder
+        if target is None:
+            target = int(np.ceil(self.WideningBase
+                                 * (node.Plays + 1) ** self.WideningExponent))
+        target = min(len(order), max(1, target))
+        start = len(node.Children)
+        if target <= start:
+            return
+        added = np.zeros(target - start)
+        node.Actions = np.append(node.Actions, order[start:target])
+        node.Children.extend([None] * (target - start))
+        node._childWinRates = np.append(node._childWinRates, added)
+        node._childPlays = np.append(node._childPlays, added)
+        node._childTotals = np.append(node._childTotals, added)
+        node._childSquares = np.append(node._childSquares, added)
+        node._childMask = np.append(node._childMask, added)
+        for slot in range(start, target):
+            self._addChild(node, slot)
+        node._childPriors = node.Priors[node.Actions]
 
     def DropRoot(self):
         """ Resets self.Root to None
         """
         self.Root = None
 
+    def ExportTree(self, path):
+        """ Writes the tree below self.Root to a .npz file.
+
+            The file holds the columns of TreeStats.TreeArrays and the entries
+            of TreeStats.TreeSummary, the latter prefixed with 'summary_'.
+
+            Args:
+                path: The file name to write.
+
+            Returns:
+                The dict of columnar numpy arrays that was written.
+        """
+        assert self.Root is not None, 'There is a tree to export.'
+        return ExportTree(self.Root, path)
+
     def FindMove(self, state, temp=0.1, moveTime=None, playLimit=None):
         """ Finds the optimal move in a position.
 
@@ -164,7 +445,8 @@ class MCTS(object):
 
             Raises:
                 TypeError: state was not an object of type GameState.
-                ValueError: The function was not able to determine a stop time.
+                ValueError: The function was not able to determine a stop time,
+                    or sequential halving was requested without a playLimit.
         """
         if not isinstance(state, GameState):
             raise TypeError('State not of type GameState')
@@ -179,14 +461,20 @@ class MCTS(object):
 
         if endTime is None and playLimit is None:
             raise ValueError('Not enough information to decide a stop time.')
+        if self.RootSearch == 'halving' and playLimit is None:
+            raise ValueError('Sequential halving needs a playLimit.')
 
         if self.Root is None:
             self.Root = Node(state, state.LegalActions(),
                              self.GetPriors(state))
         assert self.Root.State == state, 'Primed for the correct input state.'
 
-        self._runMCTS(temp, endTime, playLimit)
-        action = self._selectAction(self.Root, temp, exploring=False)
+        if self.RootSearch == 'halving':
+            slot = self._runSequentialHalving(temp, endTime, playLimit)
+        else:
+            self._runMCTS(temp, endTime, playLimit)
+            slot = self._selectAction(self.Root, temp, exploring=False)
+        action = self.Root.Actions[slot]
 
         return (self._applyAction(state, action), self.Root.WinRate(),
                 self.Root.ChildProbability())
@@ -217,6 +505,29 @@ class MCTS(object):
         while self.Root.Parent is not None:
             self.Root = self.Root.Parent
 
+    def SpawnRng(self):
+        """ Creates an independent Generator for a worker of this search.
+
+            Children are spawned from this search's seed, so a seeded search
+            hands out the same sequence of worker streams on every run.
+
+            Returns:
+                A numpy Generator.
+        """
+        return np.random.default_rng(self._seedSequence.spawn(1)[0])
+
+    def TreeStats(self):
+        """ Flattens and summarizes the tree below self.Root.
+
+            Returns:
+                A tuple of the columnar numpy arrays from TreeStats.TreeArrays
+                    (depth, parent, action, plays, value, winRate and prior per
+                    node) and the dict from TreeStats.TreeSummary.
+        """
+        assert self.Root is not None, 'There is a tree to summarize.'
+        arrays = TreeArrays(self.Root)
+        return arrays, TreeSummary(arrays)
+
     def _applyAction(self, state, action):
         """ Applies an action to a provided state.
 
@@ -228,6 +539,39 @@ class MCTS(object):
         s.ApplyAction(action)
         return s
 
+    def _backPropAmaf(self, leaf, stateValue, playerForValue, actions):
+        """ Backs up all-moves-as-first statistics from a leaf to self.Root.
+
+            Every node on the path from the leaf to the root credits the value
+            to each action its player to move went on to play later in the
+            playout, whether in the tree or in the rollout. Only the first
+            occurrence of an action counts.
+
+            Args:
+                leaf: A Node object which is the leaf of the current playout.
+                stateValue: The MCTS-created evaluation to back-propogate.
+                playerForValue: The player which stateValue applies to.
+                actions: A list of ints holding the actions played in the
+                    rollout from the leaf's state.
+        """
+        actions = list(actions)
+        node = leaf
+        while node is not None:
+            played = np.unique(np.array(actions[0::2], dtype=np.int64))
+            if len(played) > 0:
+                value = (stateValue if node.State.Player == playerForValue
+                         else 1 - stateValue)
+                if node._childAmafPlays is None:
+                    node._childAmafValues = np.zeros(len(node.LegalActions))
+                    node._childAmafPlays = np.zeros(len(node.LegalActions))
+                node._childAmafPlays[played] += 1
+                node._childAmafValues[played] += value
+            if node is self.Root:
+                break
+            if node.Action is not None:
+                actions.insert(0, node.Action)
+            node = node.Parent
+
     def _backProp(self, leaf, stateValue, playerForValue):
         """ Backs up a value from a leaf through to self.Root.
 
@@ -242,13 +586,19 @@ class MCTS(object):
                 playerForValue: The player which stateValue applies to.
         """
         leaf.Plays += 1
-        if leaf.Parent is not None:
-            if leaf.Parent.State.Player == playerForValue:
-                leaf.Value += stateValue
+        parent = leaf.Parent
+        if parent is not None:
+            if parent.State.Player == playerForValue:
+                value = stateValue
             else:
-                leaf.Value += 1 - stateValue
+                value = 1 - stateValue
+            leaf.Value += value
+            slot = leaf._slot
+            parent._childPlays[slot] += 1
+            parent._childTotals[slot] += value
+            parent._childSquares[slot] += value * value
 
-            self._backProp(leaf.Parent, stateValue, playerForValue)
+            self._backProp(parent, stateValue, playerForValue)
 
     def _moveRoot(self, state):
         """ Updates the root of the tree.
@@ -256,7 +606,8 @@ class MCTS(object):
             Move the root of the tree to the provided state. Use this to update
             the root so that tree integrity can be maintained between moves if
             necessary. Does nothing if Root is None, for example after running
-            DropRoot().
+            DropRoot(). The tree is dropped if no child holds the state, which
+            includes a symmetric child whose shared Node holds the mirror image.
 
             Args:
                 state: A GameState object which self.Root should be updated to.
@@ -271,15 +622,16 @@ class MCTS(object):
                 continue
             if child.State == state:
                 self.Root = child
-                break
+                return
+        self.Root = None
 
     def _runMCTS(self, temp, endTime=None, nPlays=None):
         """ Run the MCTS algorithm on the current Root Node.
 
             Given the current game state, represented by self.Root, a child node
-            is seleted using the _findLeaf method. This method will apply temp to
-            all child node move selection proportions, compute the sampled value
-            of the action, and backpropogate the value through the tree.
+            is seleted using the _findLeaf method. This method will compute the
+            sampled value of the action, and backpropogate the value through the
+            tree. temp is only applied to the final move choice in FindMove.
 
             Args:
                 temp: A float determining the temperature to apply in FindMove.
@@ -289,48 +641,215 @@ class MCTS(object):
         endPlays = self.Root.Plays + (nPlays if nPlays is not None else 0)
         while ((endTime is None or (time() < endTime or self.Root.Children is None))
                 and (nPlays is None or self.Root.Plays < endPlays)):
-            node = self._findLeaf(self.Root, temp)
+            self._playout(self.Root, temp)
+
+    def _playout(self, node, temp):
+        """ Runs one playout through a node and backs up its value.
+
+            A leaf is found below the node with _findLeaf, evaluated and
+            backpropogated to self.Root. _findLeaf returns a non-root node
+            itself if it is terminal or left to the endgame solver.
+
+            Args:
+                node: A Node object which is self.Root or one of its
+                    descendants.
+                temp: A float determining the temperature to apply in FindMove.
+        """
+        leaf = self._findLeaf(node, temp)
+
+        actions = [] if self.Rave else None
+        val = self._evaluateLeaf(leaf, actions)
+        self._backProp(leaf, val, leaf.State.PreviousPlayer)
+        if self.Rave:
+            self._backPropAmaf(leaf, val, leaf.State.PreviousPlayer, actions)
+
+    def _runSequentialHalving(self, temp, endTime, nPlays):
+        """ Splits a playout budget between root actions by halving.
+
+            The candidates are every legal root action, or with Gumbel set the
+            top HalvingWidth actions by Gumbel noise plus log prior. In each of
+            ceil(log2(candidates)) phases every remaining candidate gets an
+            equal share of the phase's budget through _playout, then the
+            better half by child win rate (plus the Gumbel score) is kept.
+            Candidates are cut to the best ones, in Gumbel or widening order,
+            until every phase can visit each of them once, and no more than
+            nPlays playouts are run.
+
+            Args:
+                temp: A float determining the temperature to apply in FindMove.
+                endTime: (optional) A time after which no new phase starts.
+                nPlays: The number of playouts to spend.
+
+            Returns:
+                choice: An int representing the slot of the surviving action.
+        """
+        root = self.Root
+        if root.Children is None:
+            self.AddChildren(root)
+        if self.Widening:
+            # Halving ranks every candidate itself, so the root is not
+            # widened progressively.
+            self._widen(root, len(root._wideningOrder))
+        legal = root._childMask == 0
+        priors = root.Priors[root.Actions]
+        candidates = np.where(legal & (priors > 0))[0]
+        if len(candidates) == 0:
+            candidates = np.where(legal)[0]
+
+        gumbelScores = np.zeros(len(root.Actions))
+        if self.Gumbel:
+            logPriors = np.log(priors[candidates]
+                               / np.sum(priors[candidates]))
+            gumbelScores[candidates] = (self.Rng.gumbel(size=len(candidates))
+                                        + logPriors)
+            order = np.argsort(-gumbelScores[candidates], kind='stable')
+            candidates = candidates[order[:self.HalvingWidth]]
+
+        width = len(candidates)
+        while width > 1 and width * int(np.ceil(np.log2(width))) > nPlays:
+            width -= 1
+        if width < len(candidates):
+            if self.Gumbel:
+                candidates = candidates[:width]
+            else:
+                slotOf = np.zeros(len(root.LegalActions), dtype=np.int64)
+                slotOf[root.Actions] = np.arange(len(root.Actions))
+                ranked = slotOf[self._wideningOrder(root)]
+                candidates = ranked[np.isin(ranked, candidates)][:width]
+
+        remaining = nPlays
+        phases = max(1, int(np.ceil(np.log2(len(candidates)))))
+        for _ in range(phases):
+            if len(candidates) == 1 or remaining <= 0:
+                break
+            if endTime is not None and time() >= endTime:
+                break
+            visits = max(1, nPlays // (phases * len(candidates)))
+            for slot in candidates:
+                for _ in range(min(visits, remaining)):
+                    self._playout(root.Children[slot], temp)
+                remaining -= min(visits, remaining)
 
-            val = self.SampleValue(node.State, node.State.PreviousPlayer)
-            self._backProp(node, val, node.State.PreviousPlayer)
+            scores = root.ChildWinRates()[candidates]
+            if self.Gumbel:
+                # The Gumbel MuZero sigma transform, c_visit=50, c_scale=1.
+                maxPlays = np.max(root.ChildPlays()[candidates])
+                scores = gumbelScores[candidates] + (50 + maxPlays) * scores
+            order = np.argsort(-scores, kind='stable')
+            candidates = candidates[order[:(len(candidates) + 1) // 2]]
+
+        return int(candidates[0])
+
+    def _childValues(self, node):
+        """ Finds the child values that exploration is applied to.
+
+            These are the child win rates, blended in RAVE mode with the AMAF
+            win rates using the weights from RaveSchedule.
+
+            Args:
+                node: A Node object which must have children Nodes.
+
+            Returns:
+                A numpy array of size [num_slots] of child values.
+        """
+        winRates = node.ChildWinRates()
+        if not self.Rave or node._childAmafPlays is None:
+            return winRates
+        beta = self.RaveSchedule(node.ChildPlays(),
+                                 node._childAmafPlays[node.Actions])
+        return ((1 - beta) * winRates
+                + beta * node.ChildAmafWinRates()[node.Actions])
+
+    def _evaluateLeaf(self, node, actions=None):
+        """ Finds the value of a leaf for the player who moved into it.
+
+            Leaves with at most EndgameThreshold moves remaining are solved
+            exactly once and keep their proven value. All other leaves are
+            valued with SampleValue.
+
+            Args:
+                node: A Node object returned by _findLeaf.
+                actions: An optional list to which the rollout actions are
+                    appended.
+
+            Returns:
+                A float representing the value of the leaf for
+                    node.State.PreviousPlayer.
+        """
+        player = node.State.PreviousPlayer
+        if node.ProvenValue is not None:
+            return node.ProvenValue
+        if self._isEndgameLeaf(node):
+            node.ProvenValue = self.Solver.Value(node.State, player)
+            return node.ProvenValue
+        return self.SampleValue(node.State, player, actions)
+
+    def _isEndgameLeaf(self, node):
+        """ Checks whether a node is valued by the endgame solver.
+
+            Such nodes are leaves: they are solved by _evaluateLeaf instead
+            of being expanded, and _findLeaf stops at them. Only the root is
+            expanded regardless, so that a move can be chosen.
+
+            Args:
+                node: A Node object.
+
+            Returns:
+                True if the node is proven or within EndgameThreshold.
+        """
+        if node.ProvenValue is not None:
+            return True
+        return (self.Solver is not None
+                and node.State.MovesRemaining() <= self.EndgameThreshold)
 
     def _selectAction(self, root, temp, exploring=True):
         """ Chooses an action from an explored root.
 
-            Selects a child of the root using an upper confidence interval. If
-            you are not exploring, setting the exploring flag to false will
-            instead choose the one with the highest expected payout - ignoring 
-            the exploration/regret factor.
+            Selects a child of the root using the upper confidence bound of
+            self.SelectionPolicy. If you are not exploring, setting the
+            exploring flag to false will instead choose the move to play: the
+            one with the highest expected payout, or with a temp above 0 a
+            sample of the visit counts. A widened root is widened first when
+            exploring.
 
             Args:
                 root: A Node object which must have children Nodes.
                 temp: The temperature to apply to the children Node visit
-                    counts. If temp is 0, _selectAction will return the child
-                    Node with the greatest visit count.
+                    counts when not exploring. If temp is 0, _selectAction
+                    will return the child Node with the greatest win rate.
                 exploring: A boolean toggle for overriding the selection type to
-                    a simple argmax.  If True, _selectAction will return the
-                    child Node with the greatest visit count.
+                    a move choice. If True, temp is ignored and the child with
+                    the greatest upper confidence bound is returned.
 
             Returns:
-                choice: An int representing the index of the selected action.
+                choice: An int representing the slot of the selected action.
+                    root.Actions[choice] is the action itself.
         """
         assert root.Children is not None, 'The node has children to select.'
 
-        if not exploring or temp == 0:
-            allPlays = sum(root.ChildPlays())
-            explorationFactor = 1 if exploring else 0
-            upperConfidence = (root.ChildWinRates()
-                               + (explorationFactor * self.ExplorationRate *
-                                  root.Priors * np.sqrt(1.0 + allPlays))
-                               / (1.0 + root.ChildPlays()))
-            choice = np.argmax(upperConfidence)
-            p = None
+        if exploring and self.Widening:
+            self._widen(root)
+        policy = self.SelectionPolicy
+        if exploring or temp == 0:
+            if exploring:
+                scores = policy.Scores(root, self._childValues(root),
+                                       self.ExplorationRate)
+            else:
+                scores, = policy.Buffers(len(root.Actions))
+                np.copyto(scores, root.ChildWinRates())
+            scores += root._childMask
+            choice = int(np.argmax(scores))
         else:
-            allPlays = sum([p ** (1 / temp) for p in root.ChildPlays()])
-            p = [c ** (1 / temp) / allPlays for c in root.ChildPlays()]
-            choice = np.random.choice(len(root.ChildPlays()), p=p)
-
-        assert root.LegalActions[choice] == 1, 'Selected move is legal.'
+            # Illegal slots are never played, so their weight is already 0.
+            p, = policy.Buffers(len(root.Actions))
+            np.power(root._childPlays, 1 / temp, out=p)
+            np.cumsum(p, out=p)
+            if p[-1] == 0:
+                p = np.cumsum(root._childMask == 0)
+            choice = int(np.searchsorted(p, self.Randoms.random() * p[-1],
+                                         side='right'))
+
+        assert root._childMask[choice] == 0, 'Selected move is legal.'
         return choice
 
     '''Functions to override'''
@@ -347,31 +866,63 @@ class MCTS(object):
             Returns:
                 A numpy array of ones of shape [num_legal_actions_of_state].
         """
-        return np.array([1] * len(state.LegalActions()))
+        return np.ones(len(state.LegalActions()))
+
+    def RaveSchedule(self, plays, amafPlays):
+        """ Weights the AMAF values against the UCT values in RAVE mode.
+
+            This is the default schedule, beta = sqrt(k / (3n + k)) for n plays
+            and k = RaveEquivalence. Override it to tune the blend.
+
+            Args:
+                plays: A numpy array of the children's play counts.
+                amafPlays: A numpy array of the children's AMAF play counts.
+
+            Returns:
+                A numpy array of AMAF weights in [0, 1]. Children without AMAF
+                    samples have a weight of 0.
+        """
+        beta = np.sqrt(self.RaveEquivalence
+                       / (3 * plays + self.RaveEquivalence))
+        return np.where(amafPlays > 0, beta, 0)
 
-    def SampleValue(self, state, player):
+    def SampleValue(self, state, player, actions=None):
         """ Samples the value of a state for a specified player.
 
             This applies a set of Monte Carlo random rollouts to a state until a
-            game terminates, and returns the determined evaluation.
+            game terminates, and returns the determined evaluation. Moves are
+            chosen by self.RolloutPolicy on a single copy of the state. If
+            RolloutDepth is set, rollouts stop after that many plies and the
+            position is scored by self.Evaluator.
 
             Args:
                 state: A GameState object which the function will obtain the
                     evaluation of.
                 player: An integer representing the current player in state.
+                actions: An optional list to which the actions played in the
+                    rollout are appended.
 
             Returns:
                 A float representing the value of the state. It is 0 if it was
                     determined to be a loss, 1 if it was determined to be a win,
-                    and 0.5 if it was determined to be a draw.
+                    and 0.5 if it was determined to be a draw. Cut off rollouts
+                    return the Evaluator's value in between.
         """
-        rolloutState = state
-        winner = rolloutState.Winner()
+        policy = self.RolloutPolicy
+        rolloutState = state.Copy()
+        policy.Reset(rolloutState)
+        winner = policy.Winner(rolloutState)
+        plies = 0
         while winner is None:
-            actions = np.where(rolloutState.LegalActions() == 1)[0]
-            action = np.random.choice(actions)
-            rolloutState = self._applyAction(rolloutState, action)
-            winner = rolloutState.Winner(action)
+            if self.RolloutDepth is not None and plies >= self.RolloutDepth:
+                return self.Evaluator(rolloutState, player)
+            plies += 1
+            action = policy.SelectAction(rolloutState)
+            if actions is not None:
+                actions.append(action)
+            rolloutState.ApplyAction(action)
+            policy.Update(rolloutState, action)
+            winner = policy.Winner(rolloutState, action)
         return 0.5 if winner == 0 else int(player == winner)
 
     def _findLeaf(self, node, temp):
@@ -386,7 +937,7 @@ class MCTS(object):
 
     def __getstate__(self):
         self_dict = self.__dict__.copy()
-        del self_dict['Pool']
+        self_dict.pop('Pool', None)
         return self_dict
 
 
@@ -0,0 +1,33 @@
+import numpy as np
+
+
+class RandomPool(object):
+    """ Hands out uniform random floats from blocks drawn in bulk.
+
+        Drawing one number from a numpy Generator costs about a microsecond of
+        call overhead. The pool instead draws BlockSize numbers at a time and
+        serves them from a Python list, so a draw is a list index. It has the
+        same random() method as a Generator and np.random, so it can be
+        passed wherever those are used for uniform draws. The sequence of
+        numbers only depends on the Generator it was given.
+
+        Attributes:
+            Rng: The numpy Generator that fills the pool.
+            BlockSize: The number of floats drawn per refill.
+    """
+
+    def __init__(self, rng, blockSize=65536):
+        self.Rng = rng
+        self.BlockSize = blockSize
+        self._block = []
+        self._index = 0
+
+    def random(self):
+        """ Draws a uniform float in [0, 1).
+        """
+        if self._index >= len(self._block):
+            self._block = self.Rng.random(self.BlockSize).tolist()
+            self._index = 0
+        value = self._block[self._index]
+        self._index += 1
+        return value
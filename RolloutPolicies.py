@@ -0,0 +1,165 @@
+import numpy as np
+from .WinningLines import WinningLines
+
+
+class RolloutPolicy(object):
+    """ Base class for choosing moves in MCTS rollouts.
+
+        MCTS.SampleValue copies the leaf state once and plays the rollout on
+        that copy. It calls Reset with the copy, then alternates SelectAction,
+        GameState.ApplyAction and Update until Winner returns a result.
+        Policies may keep incremental state between these calls.
+
+        Attributes:
+            Random: The source of uniform draws, any object with a random()
+                method. MCTS sets it to its own RandomPool, so a policy object
+                should not be shared between searches.
+    """
+
+    def __init__(self, random=None):
+        self.Random = random if random is not None else np.random
+
+    def Reset(self, state):
+        """ Prepares the policy for a rollout starting from state.
+        """
+        pass
+
+    def SelectAction(self, state):
+        """ Chooses the next rollout action for state.Player.
+
+            Returns:
+                An int representing a legal action of state.
+        """
+        raise NotImplementedError
+
+    def Update(self, state, action):
+        """ Observes an action that has just been applied to state.
+        """
+        pass
+
+    def Winner(self, state, prevAction=None):
+        """ Finds the winner of the rollout state.
+
+            Returns:
+                The result of state.Winner(prevAction): None if the game is
+                    not over, 0 for a draw or the winning player.
+        """
+        return state.Winner(prevAction)
+
+
+class RandomPolicy(RolloutPolicy):
+    """ Plays uniformly random legal actions.
+    """
+
+    def SelectAction(self, state):
+        return state.RandomAction(self.Random)
+
+
+class WinningLinePolicy(RolloutPolicy):
+    """ Plays immediate wins, then blocks, then uniformly random actions.
+
+        Works on any state that implements GameState.LineGeometry. The
+        WinningLines table of the board is built once per geometry. During a
+        rollout the policy keeps each player's stone count on every line, and
+        the set of empty cells that would complete a line for each player.
+        Each move updates only the lines through its cell, so finding a win
+        or block and detecting the end of the game are O(1) per ply.
+    """
+
+    def Reset(self, state):
+        rows, cols, inARow, gravity = state.LineGeometry()
+        self._table = WinningLines.ForGeometry(rows, cols, inARow)
+        self._cols = cols
+        self._rows = rows
+        self._inARow = inARow
+        self._gravity = gravity
+
+        board = state.AsInputArray()[0, :, :, :2].reshape(-1, 2)
+        lines = self._table.Lines
+        self._owners = (board[:, 0] + 2 * board[:, 1]).astype(int).tolist()
+        self._counts = {1: board[:, 0][lines].sum(axis=1).astype(int).tolist(),
+                        2: board[:, 1][lines].sum(axis=1).astype(int).tolist()}
+        self._empty = self._owners.count(0)
+
+        self._winner = None
+        self._threats = {1: set(), 2: set()}
+        for p, o in ((1, 2), (2, 1)):
+            for index in range(len(lines)):
+                if self._counts[o][index] > 0:
+                    continue
+                if self._counts[p][index] == inARow:
+                    self._winner = p
+                elif self._counts[p][index] == inARow - 1:
+                    self._threats[p].add(self._emptyCell(index))
+        if self._winner is None and self._empty == 0:
+            self._winner = 0
+
+        if gravity:
+            self._heights = [rows] * cols
+            for col in range(cols):
+                for row in range(rows):
+                    if self._owners[row * cols + col] == 0:
+                        self._heights[col] = row
+                        break
+            self._legal = [c for c in range(cols) if self._heights[c] < rows]
+        else:
+            self._legal = [c for c in range(rows * cols)
+                           if self._owners[c] == 0]
+        self._legalIndex = {a: i for i, a in enumerate(self._legal)}
+
+    def SelectAction(self, state):
+        player = state.Player
+        for cells in (self._threats[player], self._threats[3 - player]):
+            for cell in cells:
+                if not self._gravity:
+                    return cell
+                col = cell % self._cols
+                if self._heights[col] * self._cols + col == cell:
+                    return col
+        return self._legal[int(self.Random.random() * len(self._legal))]
+
+    def Update(self, state, action):
+        player = state.PreviousPlayer
+        other = 3 - player
+        if self._gravity:
+            cell = self._heights[action] * self._cols + action
+            self._heights[action] += 1
+            if self._heights[action] == self._rows:
+                self._removeLegal(action)
+        else:
+            cell = action
+            self._removeLegal(action)
+        self._owners[cell] = player
+        self._empty -= 1
+        self._threats[1].discard(cell)
+        self._threats[2].discard(cell)
+
+        counts = self._counts[player]
+        otherCounts = self._counts[other]
+        for index in self._table.CellLines[cell]:
+            counts[index] += 1
+            if otherCounts[index] > 0:
+                continue
+            if counts[index] == self._inARow:
+                self._winner = player
+            elif counts[index] == self._inARow - 1:
+                self._threats[player].add(self._emptyCell(index))
+        if self._winner is None and self._empty == 0:
+            self._winner = 0
+
+    def Winner(self, state, prevAction=None):
+        return self._winner
+
+    def _emptyCell(self, index):
+        for cell in self._table.LineCells[index]:
+            if self._owners[cell] == 0:
+                return cell
+
+    def _removeLegal(self, action):
+        """ Removes an action from the legal list by swapping in the last one.
+        """
+        i = self._legalIndex.pop(action)
+        last = self._legal.pop()
+        if last != action:
+            self._legal[i] = last
+            self._legalIndex[last] = i
@@ -0,0 +1,145 @@
+import math
+import numpy as np
+
+# Stands in for a play count of 0, so unplayed children get a huge but finite
+# exploration term instead of a division by zero.
+_unplayed = 1e-300
+
+
+class SelectionPolicy(object):
+    """ Base class for scoring the children of a node in MCTS._selectAction.
+
+        Scores reads the per-slot statistics that MCTS keeps on every expanded
+        Node (_childPlays, _childTotals, _childSquares and _childPriors) and
+        writes the upper confidence bound of each slot into a scratch buffer.
+        Scratch buffers are kept per slot count and reused between calls, and
+        the square roots and logarithms of parent play counts come from
+        tables shared by all policies, so scoring allocates nothing.
+
+        Attributes:
+            Name: A short name used in reports.
+    """
+    Name = None
+    _sqrtTable = [math.sqrt(n) for n in range(4096)]
+    _logTable = [0.0] + [math.log(n) for n in range(1, 4096)]
+
+    def __init__(self):
+        self._buffers = {}
+
+    def Scores(self, node, values, explorationRate):
+        """ Scores every slot of an expanded node.
+
+            Args:
+                node: The Node object whose children are scored.
+                values: A numpy array of size [num_slots] of child values, the
+                    win rates or their RAVE blend.
+                explorationRate: The exploration constant c.
+
+            Returns:
+                A numpy array of size [num_slots] of scores. It is a scratch
+                    buffer that the next call overwrites.
+        """
+        raise NotImplementedError
+
+    def Buffers(self, size, count=1):
+        """ Gets count scratch arrays of length size, reused between calls.
+        """
+        buffers = self._buffers.get(size)
+        if buffers is None or len(buffers) < count:
+            buffers = [np.zeros(size) for _ in range(count)]
+            self._buffers[size] = buffers
+        return buffers[:count]
+
+    @classmethod
+    def Sqrt(cls, n):
+        """ Looks up sqrt(n) for an int n >= 0.
+        """
+        if n >= len(cls._sqrtTable):
+            cls._growTables(n)
+        return cls._sqrtTable[n]
+
+    @classmethod
+    def Log(cls, n):
+        """ Looks up log(n) for an int n >= 0, with log(0) taken as 0.
+        """
+        if n >= len(cls._logTable):
+            cls._growTables(n)
+        return cls._logTable[n]
+
+    @staticmethod
+    def _growTables(n):
+        # Assigned on the base class, so every policy keeps sharing them.
+        start = len(SelectionPolicy._sqrtTable)
+        end = max(2 * start, n + 1)
+        SelectionPolicy._sqrtTable = SelectionPolicy._sqrtTable + [
+            math.sqrt(i) for i in range(start, end)]
+        SelectionPolicy._logTable = SelectionPolicy._logTable + [
+            math.log(i) for i in range(start, end)]
+
+
+class PUCTPolicy(SelectionPolicy):
+    """ The prior-weighted bound of AlphaZero, and the MCTS default.
+
+        score = Q + c * P * sqrt(1 + N) / (1 + n)
+    """
+    Name = 'puct'
+
+    def Scores(self, node, values, explorationRate):
+        plays = node._childPlays
+        scores, = self.Buffers(len(plays))
+        np.add(plays, 1.0, out=scores)
+        np.divide(node._childPriors, scores, out=scores)
+        scores *= explorationRate * self.Sqrt(node.Plays + 1)
+        scores += values
+        return scores
+
+
+class UCTPolicy(SelectionPolicy):
+    """ The UCB1 bound of classic UCT. Unplayed children are tried first.
+
+        score = Q + c * sqrt(ln N / n)
+    """
+    Name = 'uct'
+
+    def Scores(self, node, values, explorationRate):
+        plays = node._childPlays
+        scores, = self.Buffers(len(plays))
+        np.maximum(plays, _unplayed, out=scores)
+        np.divide(self.Log(node.Plays), scores, out=scores)
+        np.sqrt(scores, out=scores)
+        scores *= explorationRate
+        scores += values
+        return scores
+
+
+class UCB1TunedPolicy(SelectionPolicy):
+    """ UCB1 scaled by an upper bound on each child's reward variance.
+
+        score = Q + c * sqrt(ln N / n * min(1/4, V)), where
+        V = mean(x^2) - Q^2 + sqrt(2 ln N / n). Use c = 1 for the original
+        UCB1-tuned. Unplayed children are tried first. Q in V is the child
+        win rate, taken from the node's totals and plays rather than from
+        values, which may be blended.
+    """
+    Name = 'ucb1-tuned'
+
+    def Scores(self, node, values, explorationRate):
+        plays = node._childPlays
+        totals = node._childTotals
+        scores, variance, scratch = self.Buffers(len(plays), 3)
+        np.maximum(plays, _unplayed, out=scores)
+        # mean(x^2) - Q^2 = (squares - totals * Q) / n, with Q = totals / n
+        np.divide(totals, scores, out=variance)
+        variance *= totals
+        np.subtract(node._childSquares, variance, out=variance)
+        variance /= scores
+        np.divide(self.Log(node.Plays), scores, out=scores)
+        np.multiply(scores, 2.0, out=scratch)
+        np.sqrt(scratch, out=scratch)
+        variance += scratch
+        np.minimum(variance, 0.25, out=variance)
+        scores *= variance
+        np.sqrt(scores, out=scores)
+        scores *= explorationRate
+        scores += values
+        return scores
@@ -1,4 +1,5 @@
 from Connect4MCTS import Connect4MCTS as AI
+from TreeStats import TreeArrays
 import numpy as np
 
 
@@ -24,11 +25,7 @@ def playGame(ai, playHuman = False, timePerMove = None, playsPerMove = None):
 
 
 def addRootDist(root, plays):
-    plays.append(root.Plays)
-    if root.Children is not None:
-        for c in root.Children:
-            if c is not None:
-                addRootDist(c, plays)
+    plays.extend(TreeArrays(root)['plays'].tolist())
     return
 
 if __name__=='__main__':
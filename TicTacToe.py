@@ -1,9 +1,11 @@
 from .FixedMCTS import FixedMCTS as MCTS
+from .GameState import GameState
+from .WinningLines import CanonicalSymmetry
 import numpy as np
 
 
 # Check out Connect4MCTS.py as an example here.
-class BoardState():
+class BoardState(GameState):
     players = {0: ' ', 1 : 'X', 2 : 'O'}
     def __init__(self, size = 3, inARow = 3):
         self.Board = np.zeros((size,size,2))
@@ -12,27 +14,34 @@ class BoardState():
         self.Player = 1
         self.PreviousPlayer = None
         self.Dirs = [(0,1),(1,1),(1,0),(1,-1)]
+        self._legal = np.ones(size * size)
+        self._empty = size * size
+        self._winner = None
         return 
 
     def Copy(self):
-        copy = BoardState(self.Board.shape[0])
+        copy = BoardState(self.Size, self.InARow)
         copy.Player = self.Player
         copy.Board = np.copy(self.Board)
+        copy._legal = np.copy(self._legal)
+        copy._empty = self._empty
+        copy._winner = self._winner
         return copy
 
     def LegalActions(self):
-        actions = np.zeros(self.Size * self.Size)
-        for i in range(self.Size):
-            for j in range(self.Size):
-                if np.sum(self.Board[i, j, :]) == 0:
-                    actions[self._coordsToIndex((i,j))] = 1
-
-        return actions
+        return self._legal
 
     def ApplyAction(self, action):
         coords = self._indexToCoords(action)
-        assert np.sum(self.Board[coords[0], coords[1], :]) == 0, 'Ahh. Can\'t go there! {}'.format(action)
+        assert self._legal[action] == 1, 'Ahh. Can\'t go there! {}'.format(action)
         self.Board[coords[0], coords[1], self.Player - 1] = 1
+        self._legal[action] = 0
+        self._empty -= 1
+        if self._checkVictory(self.Board[:, :, self.Player - 1],
+                              coords[0], coords[1]) is not None:
+            self._winner = self.Player
+        elif self._empty == 0:
+            self._winner = 0
         self.PreviousPlayer = self.Player
         self.Player = 1 if self.Player == 2 else 2
         return
@@ -45,28 +54,25 @@ class BoardState():
         return array
     
     def Winner(self, prevAction = None):
-        board = self._collapsed()
-
-        if prevAction is not None:
-            coords = state._indexToCoords(prevAction)
-            win = self.__checkVictory(board, coords[0], coords[1])
-            if win is not None: 
-                return win
-        else:
-            for i in range(self.Size):
-                for j in range(self.Size):
-                    if board[i,j] == 0:
-                        continue
-                    win = self._checkVictory(board, i, j)
-                    if win is not None: 
-                        return win
-
-        if self._isOver(board):
-            return 0
-        return None
-
-    def _isOver(self, board):
-        return np.sum(board > 0) == self.Size * self.Size
+        return self._winner
+
+    def CanonicalForm(self):
+        gather, actionMap = CanonicalSymmetry(self.Board.reshape(-1, 2),
+                                              self.Size)
+        if gather is None:
+            return self, None
+        canonical = self.Copy()
+        canonical.PreviousPlayer = self.PreviousPlayer
+        canonical.Board = self.Board.reshape(-1, 2)[gather]
+        canonical.Board = canonical.Board.reshape(self.Board.shape)
+        canonical._legal = self._legal[gather]
+        return canonical, actionMap
+
+    def LineGeometry(self):
+        return self.Size, self.Size, self.InARow, False
+
+    def MovesRemaining(self):
+        return self._empty
 
     def _checkVictory(self, board, i, j):
         p = board[i,j]
@@ -115,7 +121,7 @@ class BoardState():
         return (other.Board == self.Board).all()
 
     def __hash__(self):
-        return "{0}{1}".format(self.Player,str(self)).__hash__()
+        return hash((self.Player, self.Board.tobytes()))
 
 class TicTacToePlayer(MCTS):
     """Implementation of game"""
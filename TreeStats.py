@@ -0,0 +1,131 @@
+from collections import deque
+import numpy as np
+
+
+def TreeArrays(root):
+    """ Flattens a search tree into columnar arrays.
+
+        Walks the tree breadth first without recursion, so any depth is safe.
+        Nodes shared between symmetric actions are listed once, under the
+        first slot that reaches them. Row 0 is the root.
+
+        Args:
+            root: The Node object to start from.
+
+        Returns:
+            A dict of numpy arrays with one entry per node:
+                - depth: The distance from the root.
+                - parent: The row of the parent, -1 for the root.
+                - action: The action that led to the node, -1 for the root.
+                - plays: The node's Plays.
+                - value: The node's total Value.
+                - winRate: Value / Plays, 0 for unplayed nodes.
+                - prior: The parent's prior for the action, NaN for the root.
+    """
+    depth = [0]
+    parent = [-1]
+    action = [-1]
+    plays = [root.Plays]
+    value = [root.Value]
+    prior = [np.nan]
+
+    seen = {id(root)}
+    queue = deque([(root, 0)])
+    while queue:
+        node, row = queue.popleft()
+        if node.Children is None:
+            continue
+        childDepth = depth[row] + 1
+        priors = node.Priors[node.Actions].tolist()
+        for slot, child in enumerate(node.Children):
+            if child is None or id(child) in seen:
+                continue
+            seen.add(id(child))
+            queue.append((child, len(depth)))
+            depth.append(childDepth)
+            parent.append(row)
+            action.append(child.Action)
+            plays.append(child.Plays)
+            value.append(child.Value)
+            prior.append(priors[slot])
+
+    plays = np.array(plays, dtype=np.int64)
+    value = np.array(value, dtype=np.float64)
+    return {'depth': np.array(depth, dtype=np.int32),
+            'parent': np.array(parent, dtype=np.int64),
+            'action': np.array(action, dtype=np.int64),
+            'plays': plays,
+            'value': value,
+            'winRate': np.divide(value, plays, out=np.zeros(len(plays)),
+                                 where=plays > 0),
+            'prior': np.array(prior, dtype=np.float64)}
+
+
+def TreeSummary(arrays):
+    """ Summarizes the shape of a tree from its TreeArrays.
+
+        Args:
+            arrays: A dict returned by TreeArrays.
+
+        Returns:
+            A dict holding:
+                - nodes: The number of nodes.
+                - maxDepth: The depth of the deepest node.
+                - depthHistogram: A numpy array of the node count per depth.
+                - branchingFactor: The mean number of children of an
+                    expanded node.
+                - effectiveBranchingFactor: The mean perplexity,
+                    exp(entropy), of the child visit distribution of each
+                    played expanded node. It is the number of children that
+                    the visits are effectively spread over.
+                - rootVisitConcentration: The share of the root's child
+                    visits that went to its most visited child.
+                - visitConcentration: The mean of that share over every
+                    played expanded node.
+    """
+    nodes = len(arrays['depth'])
+    parent = arrays['parent'][1:]
+    childPlays = arrays['plays'][1:].astype(np.float64)
+
+    children = np.bincount(parent, minlength=nodes)
+    totals = np.bincount(parent, weights=childPlays, minlength=nodes)
+    maxes = np.zeros(nodes)
+    np.maximum.at(maxes, parent, childPlays)
+
+    share = np.divide(childPlays, totals[parent],
+                      out=np.zeros(len(childPlays)), where=totals[parent] > 0)
+    logShare = np.log(share, out=np.zeros(len(share)), where=share > 0)
+    entropy = -np.bincount(parent, weights=share * logShare, minlength=nodes)
+
+    played = totals > 0
+    concentration = np.divide(maxes, totals, out=np.zeros(nodes),
+                              where=played)
+    return {'nodes': nodes,
+            'maxDepth': int(arrays['depth'].max()),
+            'depthHistogram': np.bincount(arrays['depth']),
+            'branchingFactor': (float(children[children > 0].mean())
+                                if (children > 0).any() else 0.0),
+            'effectiveBranchingFactor': (float(np.exp(entropy[played]).mean())
+                                         if played.any() else 0.0),
+            'rootVisitConcentration': float(concentration[0]),
+            'visitConcentration': (float(concentration[played].mean())
+                                   if played.any() else 0.0)}
+
+
+def ExportTree(root, path):
+    """ Writes the TreeArrays and TreeSummary of a tree to a .npz file.
+
+        Summary entries are stored with a 'summary_' prefix.
+
+        Args:
+            root: The Node object to start from.
+            path: The file name to write, as accepted by np.savez_compressed.
+
+        Returns:
+            The dict of TreeArrays that was written.
+    """
+    arrays = TreeArrays(root)
+    summary = TreeSummary(arrays)
+    np.savez_compressed(path, **arrays,
+                        **{'summary_' + k: v for k, v in summary.items()})
+    return arrays
@@ -0,0 +1,109 @@
+import numpy as np
+
+
+class WinningLines(object):
+    """ Table of every winning line on a k-in-a-row board.
+
+        Cells are numbered row-major, so cell = row * cols + col. Tables are
+        built once per board geometry; use WinningLines.ForGeometry to share
+        them.
+
+        Attributes:
+            Rows: The number of board rows.
+            Cols: The number of board columns.
+            InARow: The number of stones in a row needed to win.
+            Lines: A numpy int array of shape [num_lines, InARow] holding the
+                cells of each line.
+            LineCells: Lines as a tuple of tuples, for fast scalar access.
+            CellLines: A tuple holding, for each cell, a tuple of the indices
+                of the lines through it.
+    """
+
+    Dirs = [(0, 1), (1, 1), (1, 0), (1, -1)]
+    _tables = {}
+
+    def __init__(self, rows, cols, inARow):
+        self.Rows = rows
+        self.Cols = cols
+        self.InARow = inARow
+
+        lines = []
+        for r in range(rows):
+            for c in range(cols):
+                for dr, dc in WinningLines.Dirs:
+                    endRow = r + (inARow - 1) * dr
+                    endCol = c + (inARow - 1) * dc
+                    if 0 <= endRow < rows and 0 <= endCol < cols:
+                        lines.append([(r + i * dr) * cols + c + i * dc
+                                      for i in range(inARow)])
+        self.Lines = np.array(lines, dtype=np.int64).reshape(-1, inARow)
+        self.LineCells = tuple(tuple(l) for l in lines)
+
+        cellLines = [[] for _ in range(rows * cols)]
+        for index, line in enumerate(lines):
+            for cell in line:
+                cellLines[cell].append(index)
+        self.CellLines = tuple(tuple(l) for l in cellLines)
+
+    @classmethod
+    def ForGeometry(cls, rows, cols, inARow):
+        """ Gets the shared table for a board geometry, building it once.
+        """
+        key = (rows, cols, inARow)
+        table = cls._tables.get(key)
+        if table is None:
+            table = cls(rows, cols, inARow)
+            cls._tables[key] = table
+        return table
+
+
+_symmetries = {}
+
+
+def BoardSymmetries(size):
+    """ Lists the 8 symmetries of a square board as gathers over flat cells.
+
+        Row t holds, for each cell of the transformed board, the index of the
+        cell it is taken from. Row 0 is the identity. Tables are built once
+        per size.
+
+        Returns:
+            A numpy int array of shape [8, size * size].
+    """
+    transforms = _symmetries.get(size)
+    if transforms is None:
+        grid = np.arange(size * size).reshape(size, size)
+        transforms = np.array([np.rot90(g, k).ravel()
+                               for g in (grid, grid.T) for k in range(4)])
+        _symmetries[size] = transforms
+    return transforms
+
+
+def CanonicalSymmetry(cells, size):
+    """ Finds the symmetry of a square board whose image has the least bytes.
+
+        This picks the canonical form for GameState.CanonicalForm.
+
+        Args:
+            cells: A numpy array with one row per cell, in row-major order.
+            size: The board width and height.
+
+        Returns:
+            A tuple of the gather and the actionMap of the best symmetry, so
+                that cells[gather] is the canonical board, or (None, None) if
+                cells are already canonical.
+    """
+    transforms = BoardSymmetries(size)
+    best = cells.tobytes()
+    bestIndex = 0
+    for t in range(1, len(transforms)):
+        board = cells[transforms[t]].tobytes()
+        if board < best:
+            best = board
+            bestIndex = t
+    if bestIndex == 0:
+        return None, None
+    gather = transforms[bestIndex]
+    actionMap = np.empty(size * size, dtype=np.int64)
+    actionMap[gather] = np.arange(size * size)
+    return gather, actionMap